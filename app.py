@@ -4,7 +4,28 @@ import numpy as np
 import random
 import plotly.express as px
 import plotly.graph_objs as go
+import os
+import time
 from news_analyzer import get_news_analysis
+from doc_search import get_document_index, highlight, parse_query
+from vector_search import get_vector_index
+from financial_store import get_financial_store
+from metrics import metrics, split_series_key
+from singleflight import singleflight_stats
+
+SEARCH_RESULTS_LIMIT = 20
+COMPANY = "zomato"  # cache key for every per-company loader below
+FINANCIAL_SYMBOL = os.getenv("FINANCIAL_SYMBOL", "ZOMATO")  # the company's id in the financial store
+
+# Loaded data and figures are cached per key for DATA_CACHE_TTL seconds, at most
+# DATA_CACHE_MAX_ENTRIES results per function; indexes are kept for RESOURCE_CACHE_TTL
+DATA_CACHE_TTL = float(os.getenv("DATA_CACHE_TTL", 15 * 60))
+DATA_CACHE_MAX_ENTRIES = int(os.getenv("DATA_CACHE_MAX_ENTRIES", "32"))
+RESOURCE_CACHE_TTL = float(os.getenv("RESOURCE_CACHE_TTL", 24 * 60 * 60))
+RESOURCE_CACHE_MAX_ENTRIES = int(os.getenv("RESOURCE_CACHE_MAX_ENTRIES", "4"))
+
+# Sidebar panel with the pipeline's stage timings, LLM usage and profiler reports
+DEBUG_PANEL = os.getenv("DEBUG_PANEL", "0") == "1"
 
 # Dummy Data Generator
 class DummyDataGenerator:
@@ -75,6 +96,130 @@ class DummyDataGenerator:
             }
         ]
 
+def metric_text(value, suffix: str = "") -> str:
+    # Metrics the filings don't give (no share count, a missing quarter) show as N/A
+    return "N/A" if value is None else f"{value}{suffix}"
+
+
+# The sample figures are shown until the company's filings are ingested into the financial store
+@st.cache_data(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def load_financial_summary(company: str) -> dict:
+    store = get_financial_store()
+    summary = store.summary(FINANCIAL_SYMBOL) if store is not None else None
+    return summary or DummyDataGenerator.generate_financial_summary()
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def load_financial_timeseries(company: str, quarters: int = None) -> pd.DataFrame:
+    store = get_financial_store()
+    if store is not None:
+        # Only the columns and quarters the charts plot are read
+        quarterly = store.quarterly(FINANCIAL_SYMBOL, columns=['quarter', 'revenue', 'net_profit'], last=quarters)
+        if not quarterly.empty:
+            return quarterly.rename(columns={
+                'quarter': 'Quarter', 'revenue': 'Revenue (₹ Cr)', 'net_profit': 'Net Profit (₹ Cr)'
+            })
+    return DummyDataGenerator.generate_financial_timeseries()
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def load_share_prices(company: str, years: int) -> pd.DataFrame:
+    store = get_financial_store()
+    if store is None:
+        return pd.DataFrame(columns=['date', 'close'])
+    start = pd.Timestamp.today().normalize() - pd.DateOffset(years=years)
+    return store.daily(FINANCIAL_SYMBOL, columns=['date', 'close'], start=start)
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def build_trend_chart(company: str, column: str, title: str, label: str, quarters: int = None) -> go.Figure:
+    # Figures are pickled into the cache, so each rerun gets its own copy to render
+    return px.line(
+        load_financial_timeseries(company, quarters), 
+        x='Quarter', 
+        y=column, 
+        title=title,
+        labels={column: label}
+    )
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def load_document_corpus(company: str) -> list:
+    return DummyDataGenerator.generate_document_corpus()
+
+
+@st.cache_resource(ttl=RESOURCE_CACHE_TTL, max_entries=RESOURCE_CACHE_MAX_ENTRIES, show_spinner=False)
+def load_document_index(company: str):
+    # Shared by every session; the corpus is only hashed again when the entry expires
+    return get_document_index(load_document_corpus(company))
+
+
+@st.cache_resource(ttl=RESOURCE_CACHE_TTL, max_entries=RESOURCE_CACHE_MAX_ENTRIES, show_spinner="Embedding documents...")
+def load_vector_index(company: str):
+    # Only filings not embedded before are chunked and embedded
+    vector_index = get_vector_index()
+    vector_index.add_documents(load_document_corpus(company))
+    return vector_index
+
+
+def render_debug_panel():
+    # Metrics are process-wide: every session since the server started contributes
+    with st.sidebar.expander("Pipeline metrics"):
+        snapshot = metrics.snapshot()
+        observations = snapshot["observations"]
+        counters = snapshot["counters"]
+
+        stages = []
+        for key, stats in observations.items():
+            name, labels = split_series_key(key)
+            if name in ("stage.seconds", "page.seconds"):
+                stages.append({
+                    "stage": labels.get("stage") or f"page: {labels.get('page')}",
+                    "count": stats["count"],
+                    "p50 ms": stats["p50"] * 1000,
+                    "p95 ms": stats["p95"] * 1000,
+                    "total s": stats["sum"],
+                })
+        if stages:
+            st.dataframe(pd.DataFrame(stages).set_index("stage").round(1))
+        else:
+            st.caption("Nothing recorded yet.")
+
+        if counters.get("llm.requests"):
+            st.caption(
+                f"LLM: {counters['llm.requests']:.0f} requests, {counters.get('llm.prompt_tokens', 0):.0f} prompt + "
+                f"{counters.get('llm.completion_tokens', 0):.0f} completion tokens, "
+                f"{counters.get('llm.retries', 0):.0f} retries, {counters.get('llm.errors', 0):.0f} errors"
+            )
+
+        hosts = [
+            {"host": split_series_key(key)[1]["host"], "count": stats["count"], "p95 ms": stats["p95"] * 1000}
+            for key, stats in observations.items() if key.startswith("fetch.host_seconds{")
+        ]
+        if hosts:
+            st.caption("Slowest hosts")
+            st.dataframe(pd.DataFrame(hosts).sort_values("p95 ms", ascending=False).head(10).set_index("host").round(1))
+
+        flights = [
+            {"group": group, "calls": stats["calls"], "shared": stats["shared"], "dedup %": stats["dedup_ratio"] * 100,
+             "avg wait ms": stats["avg_wait_seconds"] * 1000, "max wait ms": stats["max_wait_seconds"] * 1000}
+            for group, stats in singleflight_stats().items() if stats["calls"]
+        ]
+        if flights:
+            st.caption("Shared requests across sessions")
+            st.dataframe(pd.DataFrame(flights).set_index("group").round(1))
+
+        st.download_button("Metrics (JSON)", metrics.to_json(), "metrics.json", "application/json")
+        st.download_button("Metrics (Prometheus)", metrics.to_prometheus(), "metrics.prom", "text/plain")
+        st.selectbox("Profile effect maps", ["", "cprofile", "pyinstrument"],
+                     format_func=lambda mode: mode or "off", key="profile_mode")
+        for name, profile in metrics.profiles().items():
+            st.caption(f"{name} ({profile['mode']}, {time.strftime('%H:%M:%S', time.localtime(profile['created_at']))})")
+            st.code(profile["report"], language=None)
+        if st.button("Reset metrics"):
+            metrics.reset()
+
+
 def main():
     st.set_page_config(page_title="Zomato Information Dashboard", layout="wide")
     
@@ -84,14 +229,17 @@ def main():
         "Select Section", 
         ["Financial Summary", "Ask Me Anything", "Company Overview", "Sectoral Analysis"]
     )
+    # Cached data expires after DATA_CACHE_TTL; this drops it right away
+    if st.sidebar.button("Reload data"):
+        st.cache_data.clear()
+    page_start = time.perf_counter()
     
     # Financial Summary Section
     if menu == "Financial Summary":
         st.title("Zomato - Financial Performance")
         
-        # Generate Financial Data
-        financial_summary = DummyDataGenerator.generate_financial_summary()
-        financial_timeseries = DummyDataGenerator.generate_financial_timeseries()
+        # Generate Financial Data (cached across reruns and sessions)
+        financial_summary = load_financial_summary(COMPANY)
         
         # Financial Metrics
         col1, col2, col3 = st.columns(3)
@@ -102,34 +250,30 @@ def main():
         
         with col2:
             st.metric("Net Profit", financial_summary['Net Profit'])
-            st.metric("EPS", financial_summary['EPS'])
+            st.metric("EPS", metric_text(financial_summary['EPS']))
         
         with col3:
-            st.metric("P/E Ratio", financial_summary['P/E Ratio'])
-            st.metric("ROE", f"{financial_summary['ROE (%)']}%")
+            st.metric("P/E Ratio", metric_text(financial_summary['P/E Ratio']))
+            st.metric("ROE", metric_text(financial_summary['ROE (%)'], "%"))
         
         # Plots
         st.subheader("Quarterly Financial Trends")
+        quarters = st.slider("Quarters shown", min_value=4, max_value=40, value=12, step=4)
         
         # Revenue Line Chart
-        fig_revenue = px.line(
-            financial_timeseries, 
-            x='Quarter', 
-            y='Revenue (₹ Cr)', 
-            title='Quarterly Revenue Trend',
-            labels={'Revenue (₹ Cr)': 'Revenue (₹ Crore)'}
-        )
+        fig_revenue = build_trend_chart(COMPANY, 'Revenue (₹ Cr)', 'Quarterly Revenue Trend', 'Revenue (₹ Crore)', quarters)
         st.plotly_chart(fig_revenue, use_container_width=True)
         
         # Profit Line Chart
-        fig_profit = px.line(
-            financial_timeseries, 
-            x='Quarter', 
-            y='Net Profit (₹ Cr)', 
-            title='Quarterly Net Profit Trend',
-            labels={'Net Profit (₹ Cr)': 'Net Profit (₹ Crore)'}
-        )
+        fig_profit = build_trend_chart(COMPANY, 'Net Profit (₹ Cr)', 'Quarterly Net Profit Trend', 'Net Profit (₹ Crore)', quarters)
         st.plotly_chart(fig_profit, use_container_width=True)
+        
+        # Share price over the same span, when daily prices have been ingested
+        share_prices = load_share_prices(COMPANY, max(quarters // 4, 1))
+        if not share_prices.empty:
+            fig_price = px.line(share_prices, x='date', y='close', title='Share Price',
+                                labels={'date': 'Date', 'close': 'Close (₹)'})
+            st.plotly_chart(fig_price, use_container_width=True)
     
     # Ask Me Anything Section
     elif menu == "Ask Me Anything":
@@ -138,35 +282,49 @@ def main():
         # Search Input
         search_query = st.text_input("Enter a keyword to search across company documents including annual reports, quarterly reports, earnings call transcripts, sustainability reports")
         
+        # Keyword search matches words; semantic search matches meaning through the BERT embeddings
+        search_mode = st.radio("Search mode", ["Keyword", "Semantic"], horizontal=True)
+        
         if search_query:
-            # Generate document corpus
-            documents = DummyDataGenerator.generate_document_corpus()
-            
             # Search and display results
             st.subheader(f"Search Results for '{search_query}'")
             
-            # Track number of matches
-            match_count = 0
+            if search_mode == "Semantic":
+                try:
+                    vector_index = load_vector_index(COMPANY)
+                    start = time.perf_counter()
+                    query_terms, _ = parse_query(search_query)
+                    results = [
+                        (doc, f"_Similarity {score:.2f}_\n\n{highlight(chunk, query_terms)}")
+                        for score, doc, chunk in vector_index.search_documents(search_query, k=SEARCH_RESULTS_LIMIT)
+                    ]
+                except ImportError as e:
+                    st.warning(f"Semantic search needs torch and transformers installed: {e}")
+                    start = time.perf_counter()
+                    results = []
+            else:
+                # Ranked by BM25; "quoted phrases" must match word for word.
+                # The index is built once per corpus and reused from disk
+                index = load_document_index(COMPANY)
+                start = time.perf_counter()
+                results = [
+                    (index.documents[doc_id], index.snippet(doc_id, search_query))
+                    for doc_id, score in index.search(search_query, k=SEARCH_RESULTS_LIMIT)
+                ]
+            elapsed_ms = (time.perf_counter() - start) * 1000
             
-            for doc in documents:
-                # Case-insensitive search
-                if search_query.lower() in doc['content'].lower():
-                    match_count += 1
-                    
-                    # Create an expander for each result
-                    with st.expander(f"{doc['type']} - {doc['source']}"):
-                        # Highlight the search term
-                        highlighted_content = doc['content'].replace(
-                            search_query, 
-                            f"**{search_query}**"
-                        )
-                        st.markdown(highlighted_content)
+            for doc, passage in results:
+                # Create an expander for each result
+                with st.expander(f"{doc['type']} - {doc['source']}"):
+                    # Best passage with every form of the query words highlighted
+                    st.markdown(passage)
             
             # Display match information
+            match_count = len(results)
             if match_count == 0:
                 st.info("No results found. Try a different keyword.")
             else:
-                st.success(f"Found {match_count} matching document{'s' if match_count > 1 else ''}")
+                st.success(f"Found {match_count} matching document{'s' if match_count > 1 else ''} in {elapsed_ms:.1f} ms")
     
     # Company Overview Section
     elif menu == "Company Overview":
@@ -214,6 +372,10 @@ def main():
             st.error(f"Error fetching sectoral analysis: {e}")
             st.info("Please ensure the news_analyzer module is correctly implemented.")
 
+    metrics.observe("page.seconds", time.perf_counter() - page_start, labels={"page": menu})
+    if DEBUG_PANEL:
+        render_debug_panel()
+
 
 if __name__ == "__main__":
     main()
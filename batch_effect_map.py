@@ -0,0 +1,186 @@
+"""
+Headless effect map precompute. Reads company profiles and their term lists from
+the company config, searches and fetches every term's articles once for all
+companies, then analyzes each company in its own worker process and saves its
+effect map to the store, where the dashboard reads it.
+
+Usage: python batch_effect_map.py [--companies Zomato Swiggy] [--workers 4] [--config companies.json] [--refresh-links]
+"""
+import argparse
+import concurrent.futures
+import multiprocessing
+import os
+import time
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from company_profiles import load_company_profiles, union_terms
+from dedup import collapse_near_duplicates
+from metrics import metrics
+from news_analyzer import (IMPACT_PROMPT_VERSION, OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE,
+                           EffectMapGenerator)
+from news_store import read_links, save_effect_map, save_links, stale_terms
+from pipeline import DEDUP_THRESHOLD, iter_relevant_articles
+from refresh_scheduler import NEWS_TTL
+from utils import TokenBucket, search_news
+
+load_dotenv()
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+
+
+def load_titles_links(terms: List[str], refresh: bool = False, search: bool = True) -> Dict[str, Dict[str, str]]:
+    """
+    Stored search links for terms; terms that are missing or older than NEWS_TTL
+    (every term when refresh is set) are searched again and saved first.
+    """
+    titles_links, fetched_at = read_links(terms)
+    stale = list(terms) if refresh else stale_terms(fetched_at, terms, NEWS_TTL)
+    if stale and search:
+        # Stale and forced terms skip the search cache too, or it would return the same links
+        found = search_news(stale, use_cache=False)
+        if found:
+            save_links(found)
+            titles_links.update(found)
+    return {term: titles_links[term] for term in terms if term in titles_links}
+
+
+def fetch_shared_articles(titles_links: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, tuple]]:
+    """
+    Fetch and relevance-filter the articles of every term in one pass and return
+    {term: {title: (url, text)}}. A URL listed under several terms is downloaded
+    once, and a term tracked by several companies is scored once.
+    """
+    articles = {}
+    for term, title, url, text in iter_relevant_articles(titles_links):
+        if text:
+            articles.setdefault(term, {})[title] = (url, text)
+    return articles
+
+
+def company_news_items(profile: dict, articles: Dict[str, Dict[str, tuple]]) -> Dict[str, Dict[str, str]]:
+    # {title: {url: text}} over the company's terms, each headline once
+    news_items = {}
+    for term in profile["terms"]:
+        for title, (url, text) in articles.get(term, {}).items():
+            news_items.setdefault(title, {url: text})
+    return news_items
+
+
+def compute_effect_map(profile: dict, news_items: Dict[str, Dict[str, str]], rate_share: float = 1.0,
+                       batch_mode: bool = None) -> dict:
+    """
+    Analyze one company's articles. The OpenAI rate limits are per API key, so
+    each worker process gets rate_share of them.
+    """
+    start = time.perf_counter()
+    generator = EffectMapGenerator(
+        request_limiter=TokenBucket(OPENAI_REQUESTS_PER_MINUTE * rate_share),
+        token_limiter=TokenBucket(OPENAI_TOKENS_PER_MINUTE * rate_share),
+        batch_mode=batch_mode,
+    )
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    representatives, sources = collapse_near_duplicates(news_items, DEDUP_THRESHOLD)
+    impacts = generator.analyze_news_impact(client, profile["name"], profile["info"], representatives)
+    for impact in impacts:
+        impact["sources"] = sources.get(impact["event"], [])
+    return {
+        "company": profile["name"],
+        "terms": profile["terms"],
+        "computed_at": time.time(),
+        "prompt_version": IMPACT_PROMPT_VERSION,
+        "impacts": impacts,
+        "articles": len(news_items),
+        "analyzed": len(representatives),
+        "duplicates": len(news_items) - len(representatives),
+        "token_stats": dict(generator.token_stats),
+        "total_time": time.perf_counter() - start,
+    }
+
+
+def _compute_in_worker(profile: dict, news_items: Dict[str, Dict[str, str]], rate_share: float,
+                       batch_mode: bool) -> tuple:
+    # Worker processes run one company at a time; its metrics go back to the parent to be merged
+    metrics.reset()
+    effect_map = compute_effect_map(profile, news_items, rate_share, batch_mode)
+    return effect_map, metrics.dump()
+
+
+def run_batch(profiles: List[dict], workers: int = None, refresh_links: bool = False, search: bool = True,
+              batch_mode: bool = None) -> Dict[str, dict]:
+    """
+    Precompute and save the effect maps of profiles. Returns {company: effect_map}
+    for the companies that finished.
+    """
+    start = time.perf_counter()
+    terms = union_terms(profiles)
+    titles_links = load_titles_links(terms, refresh=refresh_links, search=search)
+    listed = sum(len(profile["terms"]) for profile in profiles)
+    print(f"{len(profiles)} companies track {listed} terms, {len(terms)} distinct; "
+          f"{sum(len(links) for links in titles_links.values())} links")
+
+    articles = fetch_shared_articles(titles_links)
+    print(f"Fetched articles for {len(articles)} terms in {time.perf_counter() - start:.1f}s")
+
+    workers = max(1, min(workers or BATCH_WORKERS, len(profiles)))
+    results = {}
+    # The parent already runs fetch threads and holds open connections, so workers are not forked from it.
+    # They fork from a clean server process that has imported this module, paying the import once.
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__ if __name__ != "__main__" else "batch_effect_map"])
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {
+            executor.submit(_compute_in_worker, profile, company_news_items(profile, articles),
+                            1.0 / workers, batch_mode): profile["name"]
+            for profile in profiles
+        }
+        for future in concurrent.futures.as_completed(futures):
+            company = futures[future]
+            try:
+                effect_map, worker_metrics = future.result()
+            except Exception as e:
+                metrics.incr("batch.failures")
+                print(f"Effect map failed for {company}: {e}")
+                continue
+            metrics.merge(worker_metrics)
+            save_effect_map(effect_map)
+            metrics.incr("batch.effect_maps")
+            results[company] = effect_map
+            print(f"{company}: {len(effect_map['impacts'])} impacts from {effect_map['analyzed']} articles "
+                  f"({effect_map['duplicates']} near-duplicates merged) in {effect_map['total_time']:.1f}s")
+    print(f"Precomputed {len(results)}/{len(profiles)} effect maps in {time.perf_counter() - start:.1f}s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute effect maps for the configured companies")
+    parser.add_argument("--config", help="company profiles JSON (default: COMPANY_CONFIG_PATH)")
+    parser.add_argument("--companies", nargs="*", help="company names to run (default: all in the config)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--refresh-links", action="store_true", help="search every term again, even fresh ones")
+    parser.add_argument("--no-search", action="store_true", help="only use stored search links")
+    parser.add_argument("--batch-prompts", action="store_true", help="pack several articles into each prompt")
+    parser.add_argument("--metrics-out", help="write the run's metrics here (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="profile the parent process (search, fetch, relevance) and print the report")
+    args = parser.parse_args()
+
+    profiles = load_company_profiles(args.config)
+    names = args.companies or list(profiles)
+    unknown = [name for name in names if name not in profiles]
+    if unknown:
+        parser.error(f"unknown companies: {', '.join(unknown)} (configured: {', '.join(profiles)})")
+    with metrics.profiled("batch", args.profile or ""):
+        run_batch([profiles[name] for name in names], workers=args.workers, refresh_links=args.refresh_links,
+                  search=not args.no_search, batch_mode=True if args.batch_prompts else None)
+    if args.profile:
+        print(metrics.profiles()["batch"]["report"])
+    if args.metrics_out:
+        metrics.write(args.metrics_out)
+        print(f"Metrics written to {args.metrics_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Article cache benchmark: extract_texts_concurrently latency against a local mock
+news server at increasing cache hit rates.
+
+Usage: python benchmarks/bench_article_cache.py [--articles 60] [--latency 0.2]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Relevance scoring would dominate the timings and needs the model; keep everything
+os.environ["RELEVANCE_THRESHOLD"] = "-1"
+
+import local_store  # noqa: E402
+import utils  # noqa: E402
+from mock_servers import MockNewsServer  # noqa: E402
+
+
+def run(server, articles, warm_fraction, cache_dir):
+    path = os.path.join(cache_dir, f"articles-{warm_fraction}.sqlite3")
+    local_store._article_cache = local_store.ArticleCache(path=path)
+    cache = local_store._article_cache
+
+    urls = [server.url(i) for i in range(articles)]
+    for url in urls[:int(articles * warm_fraction)]:
+        cache.put(url, "cached article body")
+    cache.hits = cache.misses = 0
+
+    titles_links = {"food delivery market": {f"article {i}": url for i, url in enumerate(urls)}}
+    requests_before = server.requests
+    start = time.perf_counter()
+    utils.extract_texts_concurrently(titles_links)
+    elapsed = time.perf_counter() - start
+    return elapsed, cache.stats()["hit_rate"], server.requests - requests_before
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = []
+    with MockNewsServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as cache_dir:
+        for warm_fraction in (0.0, 0.5, 0.9, 1.0):
+            results.append((warm_fraction, *run(server, args.articles, warm_fraction, cache_dir)))
+
+    print(f"\n{args.articles} articles, {args.latency * 1000:.0f} ms server latency")
+    for warm_fraction, elapsed, hit_rate, requests in results:
+        print(f"warm {warm_fraction:4.0%}: hit rate {hit_rate:4.0%}, {requests:3d} network requests, {elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
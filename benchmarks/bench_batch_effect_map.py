@@ -0,0 +1,98 @@
+"""
+Batch effect map benchmark against local mock news and OpenAI servers: N
+companies whose term lists overlap, precomputed by batch_effect_map.run_batch
+(articles fetched once for every company, one worker process per company)
+versus the old flow of running the companies one after another, each fetching
+its own terms' articles.
+
+Usage: python benchmarks/bench_batch_effect_map.py [--companies 6] [--terms 12] [--term-pool 24] [--workers 4]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+# Stores go to a scratch directory, every article is downloaded and analyzed (no
+# caches, no relevance model, no client-side rate limits) and Mongo is unreachable
+# so the local store is used
+os.environ["LOCAL_CACHE_DIR"] = tempfile.mkdtemp()
+os.environ["ARTICLE_CACHE_ENABLED"] = "0"
+os.environ["IMPACT_CACHE_ENABLED"] = "0"
+os.environ["RELEVANCE_THRESHOLD"] = "-1"
+os.environ["MONGODB_URI"] = "mongodb://127.0.0.1:9/?serverSelectionTimeoutMS=100"
+os.environ["OPENAI_API_KEY"] = "test"
+os.environ["OPENAI_REQUESTS_PER_MINUTE"] = "0"
+os.environ["OPENAI_TOKENS_PER_MINUTE"] = "0"
+
+from mock_servers import MockNewsServer, MockOpenAIServer  # noqa: E402
+
+
+def make_config(companies, terms_per_company, term_pool, seed=0):
+    rng = random.Random(seed)
+    pool = [f"sector indicator {i}" for i in range(term_pool)]
+    return {
+        "companies": [
+            {"name": f"Company {i}", "info": f"Company {i} runs a food delivery business.",
+             "terms": rng.sample(pool, terms_per_company)}
+            for i in range(companies)
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=6)
+    parser.add_argument("--terms", type=int, default=12, help="terms per company")
+    parser.add_argument("--term-pool", type=int, default=24, help="distinct terms the companies draw from")
+    parser.add_argument("--links", type=int, default=5, help="articles per term")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.05, 0.15))
+    args = parser.parse_args()
+
+    with MockNewsServer(latency=0.02) as news_server, MockOpenAIServer(latency=tuple(args.latency)) as openai_server:
+        os.environ["OPENAI_BASE_URL"] = openai_server.base_url  # inherited by the worker processes
+
+        from batch_effect_map import company_news_items, compute_effect_map, fetch_shared_articles, run_batch
+        from company_profiles import parse_company_profiles, union_terms
+        from news_store import save_links
+
+        profiles = list(parse_company_profiles(make_config(args.companies, args.terms, args.term_pool)).values())
+        terms = union_terms(profiles)
+        titles_links = {
+            term: {f"{term} story {j}": news_server.url(i * args.links + j) for j in range(args.links)}
+            for i, term in enumerate(terms)
+        }
+        save_links(titles_links)
+        listed = sum(len(profile["terms"]) for profile in profiles)
+        print(f"{len(profiles)} companies, {listed} term listings over {len(terms)} distinct terms, "
+              f"{args.links} articles per term")
+
+        # One company after another, each fetching its own terms' articles
+        downloads, requests = news_server.requests, openai_server.requests
+        start = time.perf_counter()
+        for profile in profiles:
+            articles = fetch_shared_articles({term: titles_links[term] for term in profile["terms"]})
+            compute_effect_map(profile, company_news_items(profile, articles))
+        sequential = time.perf_counter() - start
+        print(f"{'per company':>12}: {sequential:6.2f}s, {news_server.requests - downloads} downloads, "
+              f"{openai_server.requests - requests} LLM requests")
+
+        downloads, requests = news_server.requests, openai_server.requests
+        start = time.perf_counter()
+        results = run_batch(profiles, workers=args.workers, search=False)
+        batch = time.perf_counter() - start
+        print(f"{'batch':>12}: {batch:6.2f}s, {news_server.requests - downloads} downloads, "
+              f"{openai_server.requests - requests} LLM requests, {args.workers} workers "
+              f"({sequential / batch:.1f}x faster)")
+        print(json.dumps({name: len(effect_map["impacts"]) for name, effect_map in results.items()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Batched versus single-article impact prompts on a fixed recorded fixture
+(benchmarks/fixtures/impact_articles.json). A local fake OpenAI server replays
+the recorded answers, bills tokens the way the API does and takes longer for
+longer answers. Reports throughput, tokens and cost per article for both
+paths, and checks that both return the recorded sentiments.
+
+--malformed-rate makes that share of batch answers unparseable and --reword has
+the model paraphrase event titles, to exercise the fallback and matching paths.
+
+Batching trades a longer answer per call for fewer calls, so it pays off most
+under a request-rate limit (--requests-per-minute) and on prompt tokens.
+
+Usage: python benchmarks/bench_batched_prompts.py [--in-flight 8] [--batch-budget 6000] [--requests-per-minute 0]
+                                                  [--malformed-rate 0.0] [--reword]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+# Every run must reach the server; cached answers would hide the difference
+os.environ["IMPACT_CACHE_ENABLED"] = "0"
+
+from openai import OpenAI  # noqa: E402
+
+import news_analyzer  # noqa: E402
+from mock_servers import MockOpenAIServer  # noqa: E402
+from news_analyzer import EffectMapGenerator  # noqa: E402
+from prompt_budget import count_tokens  # noqa: E402
+from utils import TokenBucket  # noqa: E402
+
+FIXTURE_PATH = os.path.join(BENCH_DIR, "fixtures", "impact_articles.json")
+_TITLE_RE = re.compile(r"Event Title: (.+?)(?:\n|$)")
+
+
+def make_replay_responder(fixture, malformed_rate=0.0, reword=False):
+    recorded = {article["title"]: article["response"] for article in fixture["articles"]}
+
+    def respond(request):
+        prompt = "".join(message.get("content", "") for message in request.get("messages", []))
+        titles = _TITLE_RE.findall(prompt)
+        batched = request.get("response_format", {}).get("json_schema", {}).get("name") == "impact_analysis_batch"
+        if batched:
+            results = [
+                {"event": f"Re: {title.lower()}" if reword else title,
+                 **recorded.get(title, {"emoji": "😐", "how": "", "why": ""})}
+                for title in titles
+            ]
+            content = json.dumps({"results": results}, ensure_ascii=False)
+            if zlib.crc32(prompt.encode("utf-8")) % 1000 < malformed_rate * 1000:
+                content = content[:len(content) // 2]  # cut off mid-answer
+        else:
+            content = json.dumps(recorded.get(titles[0] if titles else "", {"emoji": "😐", "how": "", "why": ""}),
+                                 ensure_ascii=False)
+        prompt_tokens = count_tokens(prompt)
+        completion_tokens = count_tokens(content)
+        return {
+            "id": "chatcmpl-replay",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    return respond
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--in-flight", type=int, default=8)
+    parser.add_argument("--batch-budget", type=int, default=None, help="prompt tokens per batch")
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.3, 0.5))
+    parser.add_argument("--per-token-latency", type=float, default=0.01, help="seconds per completion token")
+    parser.add_argument("--requests-per-minute", type=float, default=0, help="request rate limit; 0 = none")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--reword", action="store_true")
+    parser.add_argument("--input-price", type=float, default=0.15, help="USD per 1M prompt tokens")
+    parser.add_argument("--output-price", type=float, default=0.60, help="USD per 1M completion tokens")
+    args = parser.parse_args()
+
+    if args.batch_budget:
+        news_analyzer.IMPACT_BATCH_TOKEN_BUDGET = args.batch_budget
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        fixture = json.load(f)
+    news_items = {article["title"]: {article["url"]: article["text"]} for article in fixture["articles"]}
+    expected = {article["title"]: article["response"]["emoji"] for article in fixture["articles"]}
+    n = len(news_items)
+    print(f"{n} recorded articles, batch budget {news_analyzer.IMPACT_BATCH_TOKEN_BUDGET} tokens, "
+          f"at most {news_analyzer.IMPACT_BATCH_MAX_ARTICLES} per batch")
+
+    for label, batch_mode in (("single", False), ("batched", True)):
+        responder = make_replay_responder(fixture, args.malformed_rate, args.reword)
+        with MockOpenAIServer(latency=tuple(args.latency), responder=responder,
+                              per_token_latency=args.per_token_latency) as server:
+            client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+            # No burst allowance, so the limit binds from the first request
+            request_limiter = TokenBucket(args.requests_per_minute, capacity=1)
+            generator = EffectMapGenerator(max_in_flight=args.in_flight, request_limiter=request_limiter,
+                                           token_limiter=TokenBucket(0), batch_mode=batch_mode)
+            start = time.perf_counter()
+            responses = {
+                title: raw_response for _, title, raw_response
+                in generator.iter_news_impacts(client, fixture["company_name"], fixture["company_info"], news_items)
+            }
+            elapsed = time.perf_counter() - start
+            cost = (server.prompt_tokens * args.input_price + server.completion_tokens * args.output_price) / 1e6
+            correct = sum(1 for title, emoji in expected.items() if responses.get(title, {}).get("emoji") == emoji)
+            print(f"{label:>8}: {elapsed:6.2f}s  {n / elapsed:6.1f} articles/s  {server.requests:3d} requests  "
+                  f"{server.prompt_tokens / n:7.1f} prompt + {server.completion_tokens / n:5.1f} completion tokens/article  "
+                  f"${cost / n * 1000:.4f} per 1k articles  {correct}/{n} match the recording")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Document search benchmark: index build, save and memory-mapped load times, and
+query latency (p50/p95) of the BM25 index for term, multi-term and phrase
+queries, next to the substring scan the Ask Me Anything page used to run.
+
+Usage: python benchmarks/bench_doc_search.py [--docs 2000] [--words 3000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from doc_search import DocumentIndex  # noqa: E402
+from mock_servers import SENTENCES  # noqa: E402
+
+QUERIES = ["delivery", "quick commerce", "Regulators reviewing norms", '"dark store networks"',
+           '"order volumes" metro', "subscription frequency", "xylophone"]
+
+
+def make_corpus(n_docs, words_per_doc, seed=0):
+    # Filing-like text: the shared sample sentences mixed with a long tail of rarer words
+    rng = random.Random(seed)
+    rare_words = [f"term{i}" for i in range(20000)]
+    documents = []
+    for i in range(n_docs):
+        words = []
+        while len(words) < words_per_doc:
+            if rng.random() < 0.5:
+                words.extend(rng.choice(SENTENCES).split())
+            else:
+                words.extend(rng.choice(rare_words) for _ in range(8))
+        documents.append({"type": f"Filing {i}", "source": "Synthetic", "content": " ".join(words[:words_per_doc])})
+    return documents
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, np.percentile(times, 50) * 1000, np.percentile(times, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    documents = make_corpus(args.docs, args.words)
+    print(f"{args.docs} documents x {args.words} words")
+
+    start = time.perf_counter()
+    index = DocumentIndex.build(documents)
+    build_time = time.perf_counter() - start
+    path = os.path.join(tempfile.mkdtemp(), "index")
+    start = time.perf_counter()
+    index.save(path)
+    save_time = time.perf_counter() - start
+    start = time.perf_counter()
+    index = DocumentIndex.load(path)
+    load_time = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    print(f"build {build_time:.2f}s, save {save_time:.2f}s, load {load_time * 1000:.1f} ms, "
+          f"{size / 1e6:.1f} MB on disk, {len(index.vocabulary)} terms")
+
+    print(f"{'query':<28}{'hits':>6}{'index p50':>12}{'p95':>9}{'snippets':>10}{'scan p50':>11}")
+    for query in QUERIES:
+        results, p50, p95 = timed(lambda: index.search(query, k=10), args.repeat)
+        _, snippet_p50, _ = timed(lambda: [index.snippet(doc_id, query) for doc_id, _ in results], args.repeat)
+        needle = query.replace('"', "").lower()
+        _, scan_p50, _ = timed(lambda: [d for d in documents if needle in d["content"].lower()], 3)
+        print(f"{query:<28}{len(results):>6}{p50:>10.2f}ms{p95:>7.2f}ms{snippet_p50:>8.2f}ms{scan_p50:>9.1f}ms")
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
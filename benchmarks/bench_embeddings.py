@@ -0,0 +1,64 @@
+"""
+Embedding throughput benchmark: texts/sec of the batched engine versus the
+original one-text-per-forward-pass generate_embeddings.
+
+Usage: python benchmarks/bench_embeddings.py [--texts 64] [--batch-size 16] [--threads 0]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch  # noqa: E402
+from utils import generate_embeddings_batch, model_registry  # noqa: E402
+
+WORDS = ("food delivery zomato swiggy quick commerce revenue growth market share "
+         "logistics riders orders city expansion regulation profit quarter demand").split()
+
+
+def legacy_generate_embeddings(text):
+    # The pre-batching implementation: no truncation, no padding mask
+    tokenizer, model = model_registry.get()
+    encoded_input = tokenizer(text, return_tensors='pt')
+    with torch.no_grad():
+        outputs = model(**encoded_input)
+        return outputs.last_hidden_state.mean(dim=1)
+
+
+def make_texts(n, seed=0):
+    rng = random.Random(seed)
+    # Lengths kept under 512 tokens so the legacy path doesn't crash
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 350))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    model_registry.get()  # exclude model load from both timings
+
+    start = time.perf_counter()
+    for text in texts:
+        legacy_generate_embeddings(text)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    generate_embeddings_batch(texts, batch_size=args.batch_size, num_threads=args.threads)
+    batched_s = time.perf_counter() - start
+
+    print(f"threads={torch.get_num_threads()} batch_size={args.batch_size} texts={len(texts)}")
+    print(f" one-at-a-time: {len(texts) / legacy_s:7.1f} texts/sec ({legacy_s:.2f}s)")
+    print(f"       batched: {len(texts) / batched_s:7.1f} texts/sec ({batched_s:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Threaded vs async fetch benchmark against local mock news servers (one server per
+"host"). Each mode runs in a fresh subprocess so peak RSS is comparable.
+
+Usage: python benchmarks/bench_fetch_modes.py [--articles 500] [--hosts 8] [--latency 0.05]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from mock_servers import MockNewsServer  # noqa: E402
+
+
+def worker(mode, base_urls, articles):
+    # Article bodies come from the mock servers, not the cache, and relevance is skipped
+    os.environ["ARTICLE_CACHE_ENABLED"] = "0"
+    os.environ["RELEVANCE_THRESHOLD"] = "-1"
+    import utils
+
+    titles_links = {}
+    for i in range(articles):
+        term = f"term {i % 54}"
+        titles_links.setdefault(term, {})[f"article {i}"] = f"{base_urls[i % len(base_urls)]}/article/{i}"
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    results = utils.extract_texts_concurrently(titles_links, mode=mode)
+    elapsed = time.perf_counter() - start
+    fetched = sum(1 for term in results.values() for url_text in term.values() if list(url_text.values())[0])
+    print(json.dumps({
+        "wall_s": elapsed,
+        "fetched": fetched,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "rss_growth_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=500)
+    parser.add_argument("--hosts", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--worker")
+    parser.add_argument("--base-urls", nargs="*")
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.base_urls, args.articles)
+        return
+
+    servers = [MockNewsServer(latency=args.latency).start() for _ in range(args.hosts)]
+    try:
+        base_urls = [server.base_url for server in servers]
+        for mode in ("threaded", "async"):
+            connections_before = sum(server.connections for server in servers)
+            out = subprocess.run(
+                [sys.executable, __file__, "--worker", mode, "--articles", str(args.articles),
+                 "--base-urls", *base_urls],
+                capture_output=True, text=True, check=True,
+            )
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            connections = sum(server.connections for server in servers) - connections_before
+            print(f"{mode:>8}: {result['wall_s']:6.2f}s wall, {result['fetched']}/{args.articles} fetched, "
+                  f"{connections} TCP connections, max RSS {result['max_rss_mb']:.0f} MB "
+                  f"(+{result['rss_growth_mb']:.0f} MB during fetch)")
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Financial store benchmark on synthetic filings: CSV ingest time, store open
+time (memory-mapped), p50/p95 latency of the slices the Financial Summary page
+asks for, and the vectorized metric computation, next to re-reading and
+filtering the CSVs with pandas on every request.
+
+Usage: python benchmarks/bench_financial_store.py [--companies 500] [--quarters 40] [--days 2520]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from financial_store import FinancialStore, compute_metrics, read_quarterly_csv  # noqa: E402
+
+
+def write_csvs(directory, companies, quarters, days, seed=0):
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f"CO{i:05d}" for i in range(companies)])
+    period_ends = pd.date_range(end="2024-12-31", periods=quarters, freq="QE")
+    base_revenue = rng.uniform(100, 20000, companies)
+    growth = rng.normal(1.03, 0.05, (companies, quarters)).cumprod(axis=1)
+    revenue = base_revenue[:, None] * growth
+    margin = rng.normal(0.08, 0.06, (companies, quarters))
+    shares = rng.uniform(10, 1000, companies)[:, None].repeat(quarters, axis=1)
+    quarterly = pd.DataFrame({
+        "Company": symbols.repeat(quarters),
+        "Quarter End": np.tile(period_ends.strftime("%Y-%m-%d"), companies),
+        "Revenue (₹ Cr)": revenue.ravel().round(2),
+        "Net Profit (₹ Cr)": (revenue * margin).ravel().round(2),
+        "Shares Outstanding": shares.ravel().round(3),
+        "Equity": (revenue * rng.uniform(2, 6, (companies, 1))).ravel().round(2),
+        "Price": (rng.uniform(20, 2000, companies)[:, None] * growth).ravel().round(2),
+    })
+    quarterly_path = os.path.join(directory, "quarterly.csv")
+    quarterly.to_csv(quarterly_path, index=False)
+
+    dates = pd.bdate_range(end="2024-12-31", periods=days)
+    closes = rng.uniform(20, 2000, companies)[:, None] * np.exp(rng.normal(0, 0.01, (companies, days)).cumsum(axis=1))
+    daily = pd.DataFrame({
+        "Symbol": symbols.repeat(days),
+        "Date": np.tile(dates.strftime("%Y-%m-%d"), companies),
+        "Close": closes.ravel().round(2),
+        "Volume": rng.integers(1_000, 1_000_000, companies * days),
+    })
+    daily_path = os.path.join(directory, "daily.csv")
+    daily.to_csv(daily_path, index=False)
+    return quarterly_path, daily_path, symbols
+
+
+def percentiles(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1000, np.percentile(times, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--quarters", type=int, default=40)
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        quarterly_path, daily_path, symbols = write_csvs(directory, args.companies, args.quarters, args.days)
+        print(f"{args.companies * args.quarters} company-quarters, {args.companies * args.days} daily prices")
+
+        store_path = os.path.join(directory, "store")
+        store = FinancialStore(store_path)
+        start = time.perf_counter()
+        store.ingest_file(quarterly_path)
+        quarterly_ingest = time.perf_counter() - start
+        start = time.perf_counter()
+        store.ingest_file(daily_path)
+        daily_ingest = time.perf_counter() - start
+        print(f"ingest: quarterly {quarterly_ingest:.2f}s, daily {daily_ingest:.2f}s")
+
+        frame = read_quarterly_csv(quarterly_path)
+        frame["period_end"] = pd.to_datetime(frame["period_end"])
+        frame = frame.sort_values(["company", "period_end"]).reset_index(drop=True)
+        start = time.perf_counter()
+        compute_metrics(frame)
+        print(f"metrics over all company-quarters: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        store = FinancialStore(store_path)
+        store.companies()  # maps both tables
+        print(f"open (memory-mapped): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        rng = np.random.default_rng(1)
+        pick = lambda: str(rng.choice(symbols))  # noqa: E731
+        queries = {
+            "last 12 quarters, 3 columns": lambda: store.quarterly(pick(), columns=["quarter", "revenue", "net_profit"], last=12),
+            "quarters in a date range": lambda: store.quarterly(pick(), start="2020-01-01", end="2022-12-31"),
+            "1 year of daily closes": lambda: store.daily(pick(), columns=["date", "close"], start="2024-01-01"),
+            "summary metrics": lambda: store.summary(pick()),
+        }
+        for label, query in queries.items():
+            p50, p95 = percentiles(query, args.repeat)
+            print(f"{label:<30} p50 {p50:7.3f} ms  p95 {p95:7.3f} ms")
+
+        def from_csv():
+            quarterly = pd.read_csv(quarterly_path)
+            return quarterly[quarterly["Company"] == pick()].tail(12)
+        p50, p95 = percentiles(from_csv, 5)
+        print(f"{'baseline: read CSV + filter':<30} p50 {p50:7.3f} ms  p95 {p95:7.3f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
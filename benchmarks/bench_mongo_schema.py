@@ -0,0 +1,87 @@
+"""
+Mongo schema benchmark: the legacy single titles_links document versus one
+document per (term, article). Runs against mongomock by default, or a real
+mongod with --uri (a throwaway database is created and dropped).
+
+Usage: python benchmarks/bench_mongo_schema.py [--terms 54] [--articles 20] [--selected 3] [--uri mongodb://localhost]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bson  # noqa: E402
+
+from news_store import LEGACY_COLLECTION, LEGACY_ID, read_titles_links, save_titles_links  # noqa: E402
+
+
+def make_titles_links(terms, articles):
+    return {
+        f"indicator term {t}": {
+            f"Headline {t}-{a} about the food delivery sector": f"https://www.livemint.com/news/{t}/{a}"
+            for a in range(articles)
+        }
+        for t in range(terms)
+    }
+
+
+def timed(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terms", type=int, default=54)
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--selected", type=int, default=3)
+    parser.add_argument("--uri")
+    args = parser.parse_args()
+
+    if args.uri:
+        from pymongo import MongoClient
+        client = MongoClient(args.uri)
+    else:
+        try:
+            import mongomock
+        except ImportError:
+            parser.error("mongomock is not installed: pip install -r benchmarks/requirements.txt, or pass --uri")
+        client = mongomock.MongoClient()
+    db = client[f"bench_{uuid.uuid4().hex[:8]}"]
+
+    titles_links = make_titles_links(args.terms, args.articles)
+    selected = list(titles_links)[:args.selected]
+    legacy = db[LEGACY_COLLECTION]
+
+    def legacy_save():
+        legacy.replace_one({"_id": LEGACY_ID}, {"_id": LEGACY_ID, "titles_links": titles_links, "time": time.time()},
+                           upsert=True)
+
+    def legacy_read():
+        document = legacy.find_one({"_id": LEGACY_ID})
+        return {term: document["titles_links"][term] for term in selected}
+
+    try:
+        blob_bytes = len(bson.encode({"_id": LEGACY_ID, "titles_links": titles_links, "time": time.time()}))
+        print(f"{args.terms} terms x {args.articles} articles, reading {args.selected} terms "
+              f"({'mongod' if args.uri else 'mongomock'})")
+        print(f"legacy document size: {blob_bytes / 1024:.0f} KB (16 MB limit)")
+        print(f"legacy   full save: {timed(legacy_save):8.2f} ms   read selected: {timed(legacy_read):8.2f} ms")
+
+        stale = {term: titles_links[term] for term in list(titles_links)[-5:]}
+        full_save = timed(lambda: save_titles_links(db, titles_links), repeat=3)
+        partial_save = timed(lambda: save_titles_links(db, stale), repeat=5)
+        read = timed(lambda: read_titles_links(db, selected))
+        print(f"per-term full save: {full_save:8.2f} ms   read selected: {read:8.2f} ms   "
+              f"refresh 5 stale terms: {partial_save:8.2f} ms")
+    finally:
+        client.drop_database(db.name)
+
+
+if __name__ == "__main__":
+    main()
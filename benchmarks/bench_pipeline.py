@@ -0,0 +1,380 @@
+"""
+Offline end-to-end benchmark of the news pipeline at a configurable scale
+(terms x articles per term). Nothing touches the network: SerpAPI is replaced
+by MockSearchClient, news sites by local MockNewsServers (one per --hosts),
+OpenAI by MockOpenAIServer and MongoDB by mongomock (or a throwaway database on
+--mongo-uri). Stages, in order:
+
+  search      search_news over every term
+  store       save_titles_links + read_titles_links (the Mongo layout)
+  fetch       extract_texts_concurrently: download and parse every article
+  embeddings  generate_embeddings_batch over the article texts, EMBED_BATCH_SIZE at a time
+  llm         EffectMapGenerator.analyze_news_impact over the fetched articles
+
+Each stage reports throughput, p50/p95 latency per request (per batch for
+embeddings) from the pipeline's own stage histograms, and the process's peak
+RSS once it finished. The pipeline runs --runs times; each stage reports the
+median of every figure, and how far its runs spread around it (the noise).
+--fixtures serves the recorded articles and answers in
+benchmarks/fixtures/impact_articles.json instead of generated ones.
+
+--save-baseline stores the report; --baseline compares against a stored one and
+flags stages whose throughput fell or p95 rose by more than --tolerance, or by
+more than the baseline's own noise for that figure when that is larger (stages
+under --min-seconds in the baseline are too short to judge; exit status 1 with
+--fail-on-regression). Baselines should use more runs than a check, e.g. --runs 9. Without transformers, embeddings use
+a hashing stand-in unless --embeddings bert is asked for.
+
+Usage: python benchmarks/bench_pipeline.py [--terms 20] [--articles 10] [--hosts 4] [--mode threaded] [--runs 5]
+                                           [--baseline benchmarks/baselines/pipeline.json] [--save-baseline PATH]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+# Every stage does its full work: no caches, no client-side rate limits, and the
+# relevance model is off (it needs BERT); stores go to a scratch directory
+os.environ["LOCAL_CACHE_DIR"] = tempfile.mkdtemp()
+os.environ["ARTICLE_CACHE_ENABLED"] = "0"
+os.environ["IMPACT_CACHE_ENABLED"] = "0"
+os.environ["RELEVANCE_THRESHOLD"] = "-1"
+os.environ["SEARCH_RATE_PER_MINUTE"] = "0"
+os.environ["OPENAI_REQUESTS_PER_MINUTE"] = "0"
+os.environ["OPENAI_TOKENS_PER_MINUTE"] = "0"
+
+from openai import OpenAI  # noqa: E402
+
+from metrics import metrics  # noqa: E402
+from mock_servers import MockNewsServer, MockOpenAIServer, MockSearchClient, article_title  # noqa: E402
+from news_analyzer import EffectMapGenerator  # noqa: E402
+from news_store import read_titles_links, save_titles_links  # noqa: E402
+from prompt_budget import count_tokens  # noqa: E402
+from utils import EMBED_BATCH_SIZE, extract_texts_concurrently, generate_embeddings_batch, search_news  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "pipeline.json")
+FIXTURE_PATH = os.path.join(BENCH_DIR, "fixtures", "impact_articles.json")
+COMPANY_NAME = "Zomato"
+COMPANY_INFO = "Zomato is an Indian restaurant aggregator and food delivery company that also runs Blinkit."
+# Scale settings that have to match for two reports to be comparable
+SCALE_KEYS = ("terms", "articles", "overlap", "hosts", "mode", "fixtures", "embeddings",
+              "search_latency", "fetch_latency", "llm_latency")
+_TITLE_RE = re.compile(r"Event Title: (.+?)(?:\n|$)")
+_COPY_RE = re.compile(r" #\d+$")
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def fixture_pages(fixture):
+    # Article n serves recorded article n mod len(articles); copies get a numbered title
+    articles = fixture["articles"]
+
+    def title(index):
+        copy = index // len(articles)
+        base = articles[index % len(articles)]["title"]
+        return f"{base} #{copy}" if copy else base
+
+    def page(index):
+        paragraphs = "".join(f"<p>{part}</p>" for part in articles[index % len(articles)]["text"].split("\n") if part)
+        return (f"<html><head><title>{title(index)}</title></head><body>"
+                f"<article><h1>{title(index)}</h1>{paragraphs}</article></body></html>").encode("utf-8")
+
+    def respond(request):
+        recorded = {article["title"]: article["response"] for article in articles}
+        prompt = "".join(message.get("content", "") for message in request.get("messages", []))
+        match = _TITLE_RE.search(prompt)
+        answer = recorded.get(_COPY_RE.sub("", match.group(1)) if match else "", {"emoji": "😐", "how": "", "why": ""})
+        content = json.dumps(answer, ensure_ascii=False)
+        usage = {"prompt_tokens": count_tokens(prompt), "completion_tokens": count_tokens(content)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return {
+            "id": "chatcmpl-replay", "object": "chat.completion", "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": usage,
+        }
+
+    return title, page, respond
+
+
+def stage_latency(stage: str) -> dict:
+    stats = metrics.snapshot("stage.seconds")["observations"].get(f'stage.seconds{{stage="{stage}"}}')
+    if not stats:
+        return {"p50_ms": None, "p95_ms": None}
+    return {"p50_ms": stats["p50"] * 1000, "p95_ms": stats["p95"] * 1000}
+
+
+def run_stage(report, name, items, fn, latency=None):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    count = items(result) if callable(items) else items
+    report[name] = {
+        "items": count,
+        "seconds": seconds,
+        "throughput": count / seconds if seconds else None,
+        **(latency() if latency else {"p50_ms": None, "p95_ms": None}),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return result
+
+
+def embed_in_batches(embed_fn, texts):
+    # The pipeline embeds in EMBED_BATCH_SIZE batches; each one is timed like a request
+    for i in range(0, len(texts), EMBED_BATCH_SIZE):
+        with metrics.timer("stage.seconds", stage="embeddings"):
+            embed_fn(texts[i:i + EMBED_BATCH_SIZE])
+    return texts
+
+
+def run_pipeline(args, news_servers, openai_server, db):
+    metrics.reset()
+    terms = [f"food delivery indicator {i}" for i in range(args.terms)]
+    search_client = MockSearchClient(news_servers, articles_per_term=args.articles, overlap=args.overlap,
+                                     latency=args.search_latency, title=args.title_fn)
+    stages = {}
+
+    titles_links = run_stage(
+        stages, "search", len(terms),
+        lambda: search_news(terms, use_cache=False, search_client=search_client),
+        lambda: stage_latency("search"),
+    )
+
+    def store():
+        save_titles_links(db, titles_links)
+        return read_titles_links(db, terms)
+
+    # One save and one read in total, so there is no per-request latency to report
+    run_stage(stages, "store", sum(len(links) for links in titles_links.values()), store)
+
+    requests_before = sum(server.requests for server in news_servers)
+    extracted = run_stage(
+        stages, "fetch",
+        lambda _: sum(server.requests for server in news_servers) - requests_before,
+        lambda: extract_texts_concurrently(titles_links, mode=args.mode),
+        lambda: stage_latency("fetch"),
+    )
+    parse = stage_latency("parse")
+    stages["fetch"]["parse_p50_ms"] = parse["p50_ms"]
+    stages["fetch"]["parse_p95_ms"] = parse["p95_ms"]
+
+    news_items = {}
+    for term_results in extracted.values():
+        for title, url_text in term_results.items():
+            news_items.setdefault(title, url_text)
+    texts = [text for url_text in news_items.values() for text in url_text.values() if text]
+
+    if args.embed_fn is not None:
+        run_stage(stages, "embeddings", len(texts), lambda: embed_in_batches(args.embed_fn, texts),
+                  lambda: stage_latency("embeddings"))
+
+    client = OpenAI(api_key="test", base_url=openai_server.base_url, max_retries=0)
+    generator = EffectMapGenerator(max_in_flight=args.in_flight)
+    requests_before = openai_server.requests
+    run_stage(
+        stages, "llm",
+        lambda _: openai_server.requests - requests_before,
+        lambda: generator.analyze_news_impact(client, COMPANY_NAME, COMPANY_INFO, news_items),
+        lambda: stage_latency("llm"),
+    )
+    stages["llm"]["prompt_tokens"] = metrics.counter("llm.prompt_tokens")
+    stages["llm"]["completion_tokens"] = metrics.counter("llm.completion_tokens")
+    return stages
+
+
+NOISE_KEYS = ("throughput", "p95_ms")
+
+
+def median_stages(runs):
+    """
+    Per stage, the median of each figure over the runs, with "noise": the spread
+    (max - min) / median of the compared figures. Peak RSS is the highest any
+    run reached.
+    """
+    stages = {}
+    for name in runs[0]:
+        stage_runs = [run[name] for run in runs]
+        stage, noise = {}, {}
+        for key, value in stage_runs[0].items():
+            values = [run[key] for run in stage_runs if run.get(key) is not None]
+            if not isinstance(value, (int, float)) or len(values) < len(stage_runs):
+                stage[key] = value
+                continue
+            stage[key] = statistics.median(values)
+            if key in NOISE_KEYS and stage[key]:
+                noise[key] = (max(values) - min(values)) / stage[key]
+        stage["peak_rss_mb"] = max(run["peak_rss_mb"] for run in stage_runs)
+        stage["noise"] = noise
+        stages[name] = stage
+    return stages
+
+
+def compare(report, baseline, tolerance, min_seconds=0.0):
+    """
+    Print each stage next to the baseline; returns the regressions found. A
+    figure is flagged when it got worse by more than tolerance or the baseline's
+    noise for it, whichever is larger. Stages that took under min_seconds in the
+    baseline are shown but never flagged, as their timings are mostly noise.
+    """
+    mismatched = [key for key in SCALE_KEYS if report["config"].get(key) != baseline["config"].get(key)]
+    if mismatched:
+        print(f"warning: baseline was run with different settings ({', '.join(mismatched)}); "
+              f"numbers are not comparable")
+    regressions = []
+    print(f"\n{'vs baseline':<12}{'throughput':>14}{'p95':>12}   (allowed)")
+    for name, stage in report["stages"].items():
+        base = baseline["stages"].get(name)
+        if not base:
+            print(f"{name:<12}{'(new stage)':>14}")
+            continue
+        cells, allowed = [], []
+        for key, higher_is_better in (("throughput", True), ("p95_ms", False)):
+            if not stage.get(key) or not base.get(key):
+                cells.append("-")
+                continue
+            limit = max(tolerance, base.get("noise", {}).get(key, 0.0))
+            allowed.append(f"{limit:.0%}")
+            change = stage[key] / base[key] - 1
+            worse = -change if higher_is_better else change
+            flagged = worse > limit and base["seconds"] >= min_seconds
+            cells.append(f"{change:+.0%}" + (" !" if flagged else ""))
+            if flagged:
+                regressions.append(f"{name} {key} {change:+.0%} (allowed {limit:.0%})")
+        print(f"{name:<12}{cells[0]:>14}{cells[1]:>12}   {' / '.join(allowed)}")
+    return regressions
+
+
+def print_report(report):
+    config = report["config"]
+    print(f"{config['terms']} terms x {config['articles']} articles, {config['hosts']} hosts, {config['mode']} fetch"
+          + (", recorded fixtures" if config["fixtures"] else "") + f", embeddings: {config['embeddings']}, "
+          f"median of {config['runs']} runs")
+    print(f"{'stage':<12}{'items':>7}{'seconds':>9}{'items/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'peak RSS MB':>13}")
+
+    def cell(value, width, fmt):
+        return f"{'-':>{width}}" if value is None else f"{value:>{width}{fmt}}"
+
+    for name, stage in report["stages"].items():
+        print(f"{name:<12}{stage['items']:>7.0f}{stage['seconds']:>9.2f}{cell(stage['throughput'], 10, '.1f')}"
+              f"{cell(stage['p50_ms'], 9, '.1f')}{cell(stage['p95_ms'], 9, '.1f')}{stage['peak_rss_mb']:>13.0f}")
+    fetch, llm = report["stages"]["fetch"], report["stages"]["llm"]
+    if fetch.get("parse_p50_ms") is not None:
+        print(f"parse per article: p50 {fetch['parse_p50_ms']:.1f} ms, p95 {fetch['parse_p95_ms']:.1f} ms")
+    print(f"LLM tokens: {llm['prompt_tokens']:.0f} prompt, {llm['completion_tokens']:.0f} completion; "
+          f"total {report['total_seconds']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terms", type=int, default=20)
+    parser.add_argument("--articles", type=int, default=10, help="search results per term")
+    parser.add_argument("--overlap", type=float, default=0.2, help="share of a term's articles shared with other terms")
+    parser.add_argument("--hosts", type=int, default=4, help="mock news servers")
+    parser.add_argument("--mode", choices=["threaded", "async"], default="threaded")
+    parser.add_argument("--in-flight", type=int, default=8, help="concurrent LLM requests")
+    parser.add_argument("--search-latency", type=float, default=0.05)
+    parser.add_argument("--fetch-latency", type=float, default=0.02)
+    parser.add_argument("--llm-latency", type=float, nargs=2, default=(0.05, 0.15))
+    parser.add_argument("--fixtures", action="store_true", help="serve the recorded articles and answers")
+    parser.add_argument("--runs", type=int, default=5, help="pipeline runs; each stage reports the median")
+    parser.add_argument("--embeddings", choices=["auto", "bert", "hashing", "off"], default="auto")
+    parser.add_argument("--mongo-uri", help="real mongod to use instead of mongomock (a throwaway database)")
+    parser.add_argument("--json-out", help="write the report here")
+    parser.add_argument("--baseline", help=f"compare against this report (e.g. {os.path.relpath(DEFAULT_BASELINE)})")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="store the report as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown before flagging")
+    parser.add_argument("--min-seconds", type=float, default=0.5,
+                        help="stages faster than this in the baseline are never flagged")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    embeddings = args.embeddings
+    if embeddings == "auto":
+        embeddings = "bert" if importlib.util.find_spec("transformers") else "hashing"
+    if embeddings == "bert":
+        args.embed_fn = generate_embeddings_batch
+    elif embeddings == "hashing":
+        from bench_vector_search import HashingEmbedder
+        args.embed_fn = HashingEmbedder()
+    else:
+        args.embed_fn = None
+
+    news_options, responder_options, args.title_fn = {}, {}, article_title
+    if args.fixtures:
+        with open(FIXTURE_PATH, encoding="utf-8") as f:
+            args.title_fn, page, respond = fixture_pages(json.load(f))
+        news_options, responder_options = {"page": page}, {"responder": respond}
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        mongo_client = MongoClient(args.mongo_uri)
+    else:
+        try:
+            import mongomock
+        except ImportError:
+            parser.error("mongomock is not installed: pip install -r benchmarks/requirements.txt, or pass --mongo-uri")
+        mongo_client = mongomock.MongoClient()
+    db_name = f"bench_{uuid.uuid4().hex[:8]}"
+
+    news_servers = [MockNewsServer(latency=args.fetch_latency, **news_options).start() for _ in range(args.hosts)]
+    try:
+        with MockOpenAIServer(latency=tuple(args.llm_latency), **responder_options) as openai_server:
+            runs, totals = [], []
+            for _ in range(args.runs):
+                mongo_client.drop_database(db_name)
+                start = time.perf_counter()
+                runs.append(run_pipeline(args, news_servers, openai_server, mongo_client[db_name]))
+                totals.append(time.perf_counter() - start)
+    finally:
+        for server in news_servers:
+            server.stop()
+        mongo_client.drop_database(db_name)
+
+    report = {
+        "config": {
+            "terms": args.terms, "articles": args.articles, "overlap": args.overlap, "hosts": args.hosts,
+            "mode": args.mode, "fixtures": args.fixtures, "embeddings": embeddings,
+            "search_latency": args.search_latency, "fetch_latency": args.fetch_latency,
+            "llm_latency": list(args.llm_latency), "in_flight": args.in_flight, "runs": args.runs,
+            "python": platform.python_version(), "cpus": os.cpu_count(), "created_at": time.time(),
+        },
+        "stages": median_stages(runs),
+        "total_seconds": statistics.median(totals),
+    }
+    print_report(report)
+
+    for path in (args.json_out, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+            print(f"report written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.min_seconds)
+        if regressions:
+            print("regressions: " + "; ".join(regressions))
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            print("no stage regressed beyond its allowance")
+
+
+if __name__ == "__main__":
+    main()
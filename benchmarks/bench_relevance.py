@@ -0,0 +1,76 @@
+"""
+Relevance filter benchmark: how many articles each term keeps and how long the
+chunk/embed/score stage takes per term.
+
+Input is the {term: {title: {url: text}}} structure produced by
+extract_texts_concurrently, dumped as JSON (run with RELEVANCE_THRESHOLD=-1 to
+dump unfiltered articles). Without --input a small synthetic corpus is used.
+
+Usage: python benchmarks/bench_relevance.py [--input extracted.json] [--thresholds 0.6 0.65 0.7]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import model_registry, score_relevance_many  # noqa: E402
+
+ON_TOPIC = ("Food delivery platforms reported higher order volumes as urban customers "
+            "ordered more meals online. Delivery partners and restaurants saw demand rise.")
+OFF_TOPIC = ("The cricket board announced the schedule for the upcoming test series. "
+             "Ticket sales open next week and the stadium will host three matches.")
+
+
+def synthetic_corpus(terms=3, per_term=20, seed=0):
+    rng = random.Random(seed)
+    corpus = {}
+    for t in range(terms):
+        articles = {}
+        for a in range(per_term):
+            body = ON_TOPIC if rng.random() < 0.5 else OFF_TOPIC
+            articles[f"article {t}-{a}"] = {f"https://example.com/{t}/{a}": "\n\n".join([body] * rng.randint(1, 8))}
+        corpus[f"food delivery trends {t}"] = articles
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.65, 0.7, 0.75])
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input) as f:
+            corpus = json.load(f)
+    else:
+        corpus = synthetic_corpus()
+
+    model_registry.get()  # exclude model load from per-term timings
+    total = 0
+    kept = {threshold: 0 for threshold in args.thresholds}
+    for term, articles in corpus.items():
+        texts = [list(url_text.values())[0] for url_text in articles.values()]
+        start = time.perf_counter()
+        scores = [score for score, _ in score_relevance_many(texts, term)]
+        elapsed = time.perf_counter() - start
+
+        total += len(texts)
+        counts = []
+        for threshold in args.thresholds:
+            n = sum(score >= threshold for score in scores)
+            kept[threshold] += n
+            counts.append(f"{threshold}:{n}")
+        print(f"{term[:45]:<45} {len(texts):>3} articles {elapsed * 1000:8.1f} ms  kept {' '.join(counts)}")
+
+    print(f"\n{total} articles over {len(corpus)} terms")
+    for threshold in args.thresholds:
+        removed = total - kept[threshold]
+        print(f"threshold {threshold}: removes {removed} ({removed / max(total, 1):.0%}) before the LLM step")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Rerun latency per dashboard page with Streamlit's AppTest harness: the median
+time of a rerun (what every widget interaction costs) with the st.cache_data /
+st.cache_resource entries cleared before each run, versus warm caches.
+
+Sectoral Analysis is rendered up to its Generate button; no network calls are made.
+
+Usage: python benchmarks/bench_rerun_latency.py [--reruns 10]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+# Keep the benchmark's indexes and caches out of the working tree
+os.environ.setdefault("LOCAL_CACHE_DIR", tempfile.mkdtemp())
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+# Clearing caches outside a server logs a bare-mode warning every time
+logging.getLogger("streamlit.runtime.caching.cache_data_api").addFilter(lambda record: record.levelno >= logging.ERROR)
+
+PAGES = {
+    "Financial Summary": None,
+    "Ask Me Anything": "food delivery",
+    "Company Overview": None,
+    "Sectoral Analysis": None,
+}
+
+
+def open_page(page, query):
+    at = AppTest.from_file(os.path.join(REPO_DIR, "app.py"), default_timeout=120).run()
+    at.sidebar.radio[0].set_value(page).run()
+    if query:
+        at.text_input[0].set_value(query).run()
+    if at.exception:
+        raise RuntimeError(f"{page} failed: {at.exception}")
+    return at
+
+
+def time_reruns(at, reruns, clear_caches):
+    times = []
+    for _ in range(reruns):
+        if clear_caches:
+            st.cache_data.clear()
+            st.cache_resource.clear()
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'page':<20}{'uncached':>12}{'cached':>10}{'saved':>9}")
+    for page, query in PAGES.items():
+        at = open_page(page, query)
+        uncached = time_reruns(at, args.reruns, clear_caches=True)
+        cached = time_reruns(at, args.reruns, clear_caches=False)
+        print(f"{page:<20}{uncached:>10.1f}ms{cached:>8.1f}ms{uncached - cached:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Startup benchmark: import time and peak RSS of the dashboard modules, with the
+lazy model registry (default) and with the model loaded eagerly at import.
+
+Usage: python benchmarks/bench_startup.py [--runs 3] [--module app]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{"import_s": elapsed, "max_rss_mb": rss_mb}}))
+"""
+
+
+def measure(module, eager, runs):
+    env = dict(os.environ)
+    env["EAGER_MODEL_LOAD"] = "1" if eager else "0"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "import_s": statistics.median(s["import_s"] for s in samples),
+        "max_rss_mb": statistics.median(s["max_rss_mb"] for s in samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--module", default="app")
+    args = parser.parse_args()
+
+    for label, eager in (("lazy registry", False), ("eager load", True)):
+        result = measure(args.module, eager, args.runs)
+        print(f"{label:>14}: import {args.module} {result['import_s']:.2f}s, "
+              f"max RSS {result['max_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Tuple import benchmark: the old utils.tuples_to_list (readlines, split on '", "',
+then list(set(sorted(...)))) versus tuple_import's streaming parser, on a
+generated file of ("term", "title", "url") tuples with repeats and titles that quote
+someone. Reports time, peak traced memory, how many tuples each parser got
+wrong, and the size and write time of the JSONL and Parquet exports.
+
+Usage: python benchmarks/bench_tuple_import.py [--lines 500000] [--duplicates 0.3] [--quoted 0.1]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from tuple_import import export_tuples, iter_tuples, pa, tuples_to_list  # noqa: E402
+
+
+def legacy_tuples_to_list(file_path, N=3):
+    # utils.tuples_to_list before the streaming parser
+    with open(file_path, 'r') as file:
+        lines = file.readlines()
+        tuple_list = []
+        for line in lines:
+            raw_elements = line.strip().strip('()').split('", "')
+            elements = []
+            temp_ele = ""
+            for i in range(0, len(raw_elements)):
+                if i < 2:
+                    elements.append(raw_elements[i].strip('"').strip("'"))
+                else:
+                    temp_ele += raw_elements[i].strip('"').strip("'")
+                    if i == len(raw_elements) - 1:
+                        elements.append(temp_ele)
+                    else:
+                        temp_ele += " "
+            if len(elements) > 0 and elements != ['']:
+                tuple_list.append(tuple(elements))
+        return list(set(sorted(tuple_list)))
+
+
+def make_rows(lines, duplicates, quoted, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(lines):
+        if rows and rng.random() < duplicates:
+            rows.append(rng.choice(rows))
+            continue
+        term = f"sector indicator {i % 500}"
+        title = f"Story {i} on {term}"
+        if rng.random() < quoted:
+            title = rng.choice([f'CEO says "{title}" is overblown', f"It's {title}", f'Analysts\' "{title}" call'])
+        rows.append((term, title, f"https://news{i % 7}.example.com/article/{i}"))
+    return rows
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=500000)
+    parser.add_argument("--duplicates", type=float, default=0.3, help="share of lines repeating an earlier one")
+    parser.add_argument("--quoted", type=float, default=0.1, help="share of titles with embedded quotes")
+    args = parser.parse_args()
+
+    rows = make_rows(args.lines, args.duplicates, args.quoted)
+    expected = list(dict.fromkeys(rows))
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "terms.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write("(" + ", ".join(json.dumps(element) for element in row) + ")\n")
+        print(f"{args.lines} lines, {len(expected)} distinct, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        def count_streamed(file_path):
+            return sum(1 for _ in iter_tuples(file_path))
+
+        legacy, legacy_s, legacy_mb = measure(legacy_tuples_to_list, path)
+        streamed, streamed_s, streamed_mb = measure(tuples_to_list, path)
+        _, counted_s, counted_mb = measure(count_streamed, path)
+        for name, result, seconds, peak in (("legacy", legacy, legacy_s, legacy_mb),
+                                            ("streaming", streamed, streamed_s, streamed_mb)):
+            wrong = len(set(result) ^ set(expected))
+            in_order = result == expected
+            print(f"{name:>16}: {seconds:6.2f}s, peak {peak:7.1f} MB, {len(result)} tuples, "
+                  f"{wrong} wrong, file order kept: {in_order}")
+        print(f"{'streaming, count':>16}: {counted_s:6.2f}s, peak {counted_mb:7.1f} MB "
+              f"(digests only; no list is built)")
+
+        outputs = [".jsonl"] + ([".parquet"] if pa is not None else [])
+        for extension in outputs:
+            out_path = os.path.join(scratch, "terms" + extension)
+            start = time.perf_counter()
+            export_tuples(path, out_path)
+            written_s = time.perf_counter() - start
+            start = time.perf_counter()
+            reread = list(iter_tuples(out_path, dedup=False))
+            read_s = time.perf_counter() - start
+            print(f"{extension:>16}: written in {written_s:5.2f}s, {os.path.getsize(out_path) / 1e6:6.1f} MB, "
+                  f"read back in {read_s:5.2f}s, matches: {reread == expected}")
+
+
+if __name__ == "__main__":
+    main()
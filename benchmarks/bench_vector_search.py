@@ -0,0 +1,118 @@
+"""
+Semantic index benchmark: build throughput (chunks/s), an incremental add of new
+filings (only their chunks are embedded), and top-k query latency p50/p95 over
+the memory-mapped matrix.
+
+By default chunks are embedded with a hashing bag-of-words projection so the
+index itself is measured, not BERT; --bert uses the real embedder.
+
+Usage: python benchmarks/bench_vector_search.py [--docs 2000] [--words 3000] [--new-docs 200] [--bert]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_doc_search import make_corpus  # noqa: E402
+from vector_search import VectorIndex  # noqa: E402
+
+QUERIES = ["delivery costs and fuel prices", "regulation of online ordering", "quick commerce expansion"]
+
+
+class HashingEmbedder:
+    """
+    Stand-in for BERT: each word adds a fixed random vector, so texts sharing
+    words land close together. Counts the chunks it embeds.
+    """
+    def __init__(self, dim: int = 768, seed: int = 0):
+        self.dim = dim
+        self.seed = seed
+        self.embedded = 0
+        self._word_vectors = {}
+
+    def _word_vector(self, word):
+        vector = self._word_vectors.get(word)
+        if vector is None:
+            rng = np.random.default_rng(zlib.crc32(word.encode("utf-8")) + self.seed)
+            vector = rng.standard_normal(self.dim).astype(np.float32)
+            self._word_vectors[word] = vector
+        return vector
+
+    def __call__(self, texts):
+        self.embedded += len(texts)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                matrix[row] += self._word_vector(word)
+        return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=3000)
+    parser.add_argument("--new-docs", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--bert", action="store_true", help="embed with the real BERT model")
+    args = parser.parse_args()
+
+    documents = make_corpus(args.docs + args.new_docs, args.words)
+    existing, new = documents[:args.docs], documents[args.docs:]
+    if args.bert:
+        from utils import generate_embeddings_batch
+        counter = {"embedded": 0}
+
+        def embed(texts):
+            counter["embedded"] += len(texts)
+            return generate_embeddings_batch(texts)
+        embed_fn, model_name, embedded = embed, None, lambda: counter["embedded"]
+    else:
+        embedder = HashingEmbedder()
+        embed_fn, model_name, embedded = embedder, "hashing-768", lambda: embedder.embedded
+
+    path = tempfile.mkdtemp()
+    try:
+        index = VectorIndex(path=path, embed_fn=embed_fn, model_name=model_name)
+        start = time.perf_counter()
+        chunks = index.add_documents(existing)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(path, "vectors.f32"))
+        print(f"build: {args.docs} documents, {chunks} chunks in {elapsed:.2f}s "
+              f"({chunks / elapsed:.0f} chunks/s), {size / 1e6:.0f} MB of vectors")
+
+        before = embedded()
+        start = time.perf_counter()
+        added = index.add_documents(existing + new)  # the old filings are skipped by content hash
+        elapsed = time.perf_counter() - start
+        print(f"incremental: +{args.new_docs} documents, {added} chunks added, "
+              f"{embedded() - before} chunks embedded in {elapsed:.2f}s")
+
+        # A fresh instance maps the saved matrix, as a restarted app would
+        index = VectorIndex(path=path, embed_fn=embed_fn, model_name=model_name)
+        for k in (10, 100):
+            times = []
+            for i in range(args.repeat):
+                query = QUERIES[i % len(QUERIES)]
+                start = time.perf_counter()
+                index.search(query, k=k)
+                times.append(time.perf_counter() - start)
+            print(f"query k={k:<3} over {len(index)} chunks: p50 {np.percentile(times, 50) * 1000:.1f} ms, "
+                  f"p95 {np.percentile(times, 95) * 1000:.1f} ms")
+        print("top documents for", repr(QUERIES[0]))
+        for score, document, _ in index.search_documents(QUERIES[0], k=3):
+            print(f"  {score:.3f}  {document['type']}")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
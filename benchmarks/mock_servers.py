@@ -0,0 +1,316 @@
+"""
+Local stand-in servers used by the benchmarks so nothing touches the real news sites.
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SENTENCES = [
+    "Food delivery platforms reported higher order volumes across metro cities this quarter.",
+    "Quick commerce players expanded their dark store networks to tier 2 cities.",
+    "Analysts expect discounting to ease as competition in the sector matures.",
+    "Delivery partners staged protests over payouts and working conditions.",
+    "Rising fuel prices pushed up last-mile delivery costs for aggregators.",
+    "Restaurant partners are experimenting with cloud kitchens to cut rent.",
+    "Regulators are reviewing food safety norms for online ordering apps.",
+    "Subscription programmes continue to lift order frequency among urban users.",
+]
+
+
+# Outlets accepted by utils.isValidNews; mock links carry one in their path
+OUTLETS = ["livemint.com", "economictimes.indiatimes.com", "financialexpress.com", "businesstoday.com",
+           "reuters.com", "indiatoday.in", "techcrunch.com", "outlookbusiness.com"]
+
+
+def article_title(index: int) -> str:
+    return f"Sector update {index}: food delivery market shifts"
+
+
+def article_html(index: int, paragraphs: int = 8) -> bytes:
+    rng = random.Random(index)
+    body = "".join(
+        "<p>" + " ".join(rng.choice(SENTENCES) for _ in range(4)) + "</p>" for _ in range(paragraphs)
+    )
+    title = article_title(index)
+    return (
+        f"<html><head><title>{title}</title></head><body>"
+        f"<article><h1>{title}</h1>{body}</article></body></html>"
+    ).encode("utf-8")
+
+
+class _ArticleHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # allow keep-alive so pooled clients can reuse connections
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        with server.stats_lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+        # /article/<n>, optionally under an outlet prefix: /<outlet>/article/<n>
+        path = self.path.split("?", 1)[0]
+        if "/article/" not in path:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        try:
+            index = int(path.rsplit("/", 1)[-1])
+        except ValueError:
+            index = 0
+        payload = server.page(index)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockNewsServer:
+    """
+    Threaded HTTP server on localhost serving article pages at /article/<n> (or
+    /<outlet>/article/<n>), with a fixed per-request latency. page(n) builds the
+    HTML, generated by default. Any other path returns 404.
+    """
+    def __init__(self, latency: float = 0.05, port: int = 0, page=article_html):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _ArticleHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.latency = latency
+        self._httpd.page = page
+        self._httpd.requests = 0
+        self._httpd.connections = 0
+        self._httpd.stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        return self._httpd.requests
+
+    @property
+    def connections(self) -> int:
+        return self._httpd.connections
+
+    def url(self, index: int, outlet: str = None) -> str:
+        if outlet:
+            return f"{self.base_url}/{outlet}/article/{index}"
+        return f"{self.base_url}/article/{index}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _ChatCompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with server.stats_lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            fail = server.rng.random() < server.error_rate
+            latency = server.rng.uniform(*server.latency)
+        try:
+            if not self.path.endswith("/chat/completions"):
+                time.sleep(latency)
+                self._send(404, {"error": {"message": "not found"}})
+            elif fail:
+                time.sleep(latency)
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}})
+            else:
+                payload = server.responder(body)
+                usage = payload.get("usage", {})
+                with server.stats_lock:
+                    server.prompt_tokens += usage.get("prompt_tokens", 0)
+                    server.completion_tokens += usage.get("completion_tokens", 0)
+                # Longer answers take longer to generate
+                time.sleep(latency + usage.get("completion_tokens", 0) * server.per_token_latency)
+                self._send(200, payload)
+        finally:
+            with server.stats_lock:
+                server.in_flight -= 1
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def impact_completion(request: dict) -> dict:
+    """
+    Deterministic chat completion for the impact-analysis prompt: the sentiment
+    is derived from a checksum of the prompt, token usage from its length.
+    """
+    prompt = "".join(message.get("content", "") for message in request.get("messages", []))
+    emoji = ["😊", "😔", "😐"][zlib.crc32(prompt.encode("utf-8")) % 3]
+    content = {"emoji": emoji, "how": "" if emoji == "😐" else "Shifts order volumes.",
+               "why": "" if emoji == "😐" else "Demand for delivery changes."}
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(json.dumps(content)) // 4
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": json.dumps(content, ensure_ascii=False)},
+        }],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+class MockOpenAIServer:
+    """
+    OpenAI-compatible /v1/chat/completions endpoint on localhost. Each call sleeps
+    for a latency drawn from the (low, high) range, plus per_token_latency for
+    every completion token, and fails with a 429 at error_rate.
+    responder(request_json) builds the completion payload; its usage is tallied
+    in prompt_tokens and completion_tokens.
+    """
+    def __init__(self, latency=(0.2, 0.6), error_rate: float = 0.0, responder=impact_completion, seed: int = 0,
+                 per_token_latency: float = 0.0):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _ChatCompletionHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.latency = latency
+        self._httpd.error_rate = error_rate
+        self._httpd.responder = responder
+        self._httpd.rng = random.Random(seed)
+        self._httpd.requests = 0
+        self._httpd.in_flight = 0
+        self._httpd.max_in_flight = 0
+        self._httpd.per_token_latency = per_token_latency
+        self._httpd.prompt_tokens = 0
+        self._httpd.completion_tokens = 0
+        self._httpd.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def requests(self) -> int:
+        return self._httpd.requests
+
+    @property
+    def max_in_flight(self) -> int:
+        return self._httpd.max_in_flight
+
+    @property
+    def prompt_tokens(self) -> int:
+        return self._httpd.prompt_tokens
+
+    @property
+    def completion_tokens(self) -> int:
+        return self._httpd.completion_tokens
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _MockSearchResult:
+    def __init__(self, client, params):
+        self._client = client
+        self._params = params
+
+    def get_dict(self) -> dict:
+        return self._client.results(self._params["q"])
+
+
+class MockSearchClient:
+    """
+    Stand-in for serpapi.GoogleSearch, passed as search_news(search_client=...).
+    Each term gets articles_per_term Google News results pointing at the mock
+    news servers (every other one grouped under "stories", as Google News does).
+    overlap is the share of a term's articles drawn from a pool shared by all
+    terms, so the same story turns up under several terms. Each call sleeps for
+    latency seconds; results only depend on the term and seed.
+    """
+    def __init__(self, news_servers, articles_per_term: int = 10, overlap: float = 0.2, latency: float = 0.05,
+                 seed: int = 0, title=article_title, shared_pool: int = None):
+        self.news_servers = list(news_servers)
+        self.articles_per_term = articles_per_term
+        self.overlap = overlap
+        self.latency = latency
+        self.seed = seed
+        self.title = title
+        self.shared_pool = shared_pool or max(articles_per_term, 1) * 4
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, params: dict) -> _MockSearchResult:
+        return _MockSearchResult(self, params)
+
+    def article_indices(self, term: str) -> list:
+        rng = random.Random(zlib.crc32(term.encode("utf-8")) + self.seed)
+        term_base = self.shared_pool + (zlib.crc32(term.encode("utf-8")) % 100_000) * self.articles_per_term
+        indices = []
+        for i in range(self.articles_per_term):
+            index = rng.randrange(self.shared_pool) if rng.random() < self.overlap else term_base + i
+            if index not in indices:
+                indices.append(index)
+        return indices
+
+    def results(self, term: str) -> dict:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        news_results = []
+        for position, index in enumerate(self.article_indices(term)):
+            server = self.news_servers[index % len(self.news_servers)]
+            item = {"title": self.title(index), "link": server.url(index, OUTLETS[index % len(OUTLETS)])}
+            if position % 2:
+                news_results.append({"title": f"Full coverage {index}", "stories": [item]})
+            else:
+                news_results.append(item)
+        return {"search_metadata": {"status": "Success"}, "news_results": news_results}
@@ -0,0 +1,58 @@
+import json
+import os
+import threading
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+COMPANY_CONFIG_PATH = os.getenv(
+    "COMPANY_CONFIG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "companies.json")
+)
+
+_profiles_cache = {}  # path -> (mtime, profiles)
+_profiles_lock = threading.Lock()
+
+
+def parse_company_profiles(config: dict) -> Dict[str, dict]:
+    """
+    {name: {"name", "info", "terms"}} from the config layout: named "term_lists"
+    shared between companies, and "companies" entries that reference them by
+    name and/or list extra "terms" of their own. Terms keep their order and
+    appear once per company.
+    """
+    term_lists = config.get("term_lists", {})
+    profiles = {}
+    for company in config.get("companies", []):
+        name = company["name"]
+        terms = []
+        for list_name in company.get("term_lists", []):
+            if list_name not in term_lists:
+                raise ValueError(f"Company {name} refers to unknown term list {list_name!r}")
+            terms.extend(term_lists[list_name])
+        terms.extend(company.get("terms", []))
+        profiles[name] = {"name": name, "info": company.get("info", ""), "terms": list(dict.fromkeys(terms))}
+    return profiles
+
+
+def load_company_profiles(path: str = None) -> Dict[str, dict]:
+    """
+    Company profiles from COMPANY_CONFIG_PATH, re-read only when the file changes.
+    """
+    path = path or COMPANY_CONFIG_PATH
+    mtime = os.path.getmtime(path)
+    with _profiles_lock:
+        cached = _profiles_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    with open(path, encoding="utf-8") as f:
+        profiles = parse_company_profiles(json.load(f))
+    with _profiles_lock:
+        _profiles_cache[path] = (mtime, profiles)
+    return profiles
+
+
+def union_terms(profiles: List[dict]) -> List[str]:
+    # Every term once, in first-seen order, so shared terms are searched and fetched once
+    return list(dict.fromkeys(term for profile in profiles for term in profile["terms"]))
@@ -0,0 +1,111 @@
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import metrics
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str, k: int = 5) -> np.ndarray:
+    """
+    Hashes of the word k-grams of text, as uint64 values below 2**31 - 1.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < k:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+    return np.unique(np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) % _MERSENNE_PRIME for gram in grams), dtype=np.uint64, count=len(grams)
+    ))
+
+
+class MinHasher:
+    """
+    num_perm universal hash functions (a*x + b) mod (2**31 - 1). Values stay below
+    2**62, so everything fits in uint64 without overflow.
+    """
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingle_hashes: np.ndarray) -> np.ndarray:
+        if shingle_hashes.size == 0:
+            return np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+        # [num_perm, n_shingles] in one vectorized pass, then the min per permutation
+        hashed = (np.outer(self._a, shingle_hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return hashed.min(axis=1)
+
+
+class NearDuplicateIndex:
+    """
+    Streaming MinHash/LSH index. add() returns the representative id of an
+    already indexed near-duplicate (estimated Jaccard >= threshold) or None when
+    the document starts a new cluster. Candidates come from LSH band buckets, so
+    each add costs about the same regardless of how many documents are indexed.
+    """
+    def __init__(self, threshold: float = 0.7, num_perm: int = 128, bands: int = 16, shingle_size: int = 5):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self._hasher = MinHasher(num_perm)
+        self._buckets = [dict() for _ in range(bands)]
+        self._signatures = {}
+        self._representative = {}
+        self._lock = threading.Lock()
+
+    def add(self, doc_id, text: str) -> Optional[object]:
+        signature = self._hasher.signature(shingles(text, self.shingle_size))
+        band_keys = [signature[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+        with self._lock:
+            best, best_score = None, self.threshold
+            seen = set()
+            for band, key in enumerate(band_keys):
+                for candidate in self._buckets[band].get(key, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    score = float(np.mean(self._signatures[candidate] == signature))
+                    if score >= best_score:
+                        best, best_score = candidate, score
+
+            self._signatures[doc_id] = signature
+            for band, key in enumerate(band_keys):
+                self._buckets[band].setdefault(key, []).append(doc_id)
+            if best is None:
+                self._representative[doc_id] = doc_id
+                return None
+            representative = self._representative[best]
+            self._representative[doc_id] = representative
+        metrics.incr("dedup.near_duplicates")
+        return representative
+
+
+def collapse_near_duplicates(news_items: Dict[str, Dict[str, str]], threshold: float = 0.7
+                             ) -> Tuple[Dict[str, Dict[str, str]], Dict[str, List[str]]]:
+    """
+    Batch form for {title: {url: text}}: returns the representative articles (first
+    of each cluster, in input order) and {representative title: [all source urls]}.
+    """
+    index = NearDuplicateIndex(threshold=threshold)
+    representatives = {}
+    sources = {}
+    for title, url_text in news_items.items():
+        url, text = next(iter(url_text.items()))
+        representative = index.add(title, text) if text else None
+        if representative is None:
+            representatives[title] = url_text
+            sources[title] = [url]
+        else:
+            sources[representative].append(url)
+    return representatives, sources
@@ -0,0 +1,368 @@
+import functools
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from local_store import CACHE_DIR
+from metrics import metrics
+
+load_dotenv()
+
+DOC_INDEX_DIR = os.getenv("DOC_INDEX_DIR", os.path.join(CACHE_DIR, "doc_index"))
+DOC_INDEX_KEEP = int(os.getenv("DOC_INDEX_KEEP", "3"))  # most recently used corpora kept on disk
+INDEX_FORMAT_VERSION = 1  # bump when tokenization, stemming or the on-disk layout changes
+
+_TOKEN_RE = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+_MARKDOWN_SPECIAL_RE = re.compile(r"([\\`*_{}\[\]<>()#+\-.!|$~])")
+
+# (suffix, replacement), first match wins; the remaining stem must keep 3+ letters
+_SUFFIXES = (
+    ("ational", "ate"), ("tional", "tion"), ("ization", "ize"), ("fulness", "ful"), ("ousness", "ous"),
+    ("iveness", "ive"), ("ements", ""), ("ement", ""), ("ments", ""), ("ment", ""), ("nesses", ""),
+    ("ness", ""), ("ings", ""), ("ing", ""), ("edly", ""), ("ies", "y"), ("ied", "y"), ("sses", "ss"),
+    ("ed", ""), ("ly", ""), ("es", ""), ("s", ""),
+)
+_KEEP_ENDINGS = ("ss", "us", "is")
+
+
+@functools.lru_cache(maxsize=200_000)
+def stem(word: str) -> str:
+    """
+    Light suffix-stripping stemmer: plurals, -ed/-ing, -ly, -ment, -ness and a few
+    Porter step-2 rules, so "deliveries"/"delivery" and "improved"/"improving"/
+    "improves" meet. Conflations are approximate; both sides of a match go
+    through the same function.
+    """
+    if word.endswith(("'s", "’s")):
+        word = word[:-2]
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word.endswith(_KEEP_ENDINGS):
+                break
+            word = word[:-len(suffix)] + replacement
+            if suffix in ("ing", "ings", "ed", "edly") and len(word) > 3 \
+                    and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]  # running -> run
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]  # improve -> improv, matching improved/improving
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(token) for token in _TOKEN_RE.findall(text.lower())]
+
+
+def parse_query(query: str) -> Tuple[List[str], List[List[str]]]:
+    """
+    Split a query into loose terms and "quoted phrases", both stemmed.
+    Returns (terms, phrases); phrase words are also scored as terms.
+    """
+    phrases = [tokenize(phrase) for phrase in _PHRASE_RE.findall(query)]
+    phrases = [phrase for phrase in phrases if phrase]
+    # A stray unbalanced quote is just a separator
+    terms = tokenize(_PHRASE_RE.sub(" ", query).replace('"', " "))
+    for phrase in phrases:
+        terms.extend(phrase)
+    return list(dict.fromkeys(terms)), phrases
+
+
+def _escape_markdown(text: str) -> str:
+    return _MARKDOWN_SPECIAL_RE.sub(r"\\\1", text)
+
+
+class DocumentIndex:
+    """
+    Positional inverted index with BM25 ranking. Postings are stored CSR-style
+    in flat numpy arrays, sorted by (term, document, position):
+      term_ptr[t]:term_ptr[t+1]   the postings of term t
+      post_doc, post_tf           document and term frequency of each posting
+      pos_ptr[p]:pos_ptr[p+1]     that posting's token positions in positions
+    Built once with build(), saved with save() and loaded memory-mapped by load(),
+    so opening even a large index costs milliseconds.
+    """
+    def __init__(self, documents: List[dict], vocabulary: Dict[str, int], doc_lengths: np.ndarray,
+                 term_ptr: np.ndarray, post_doc: np.ndarray, post_tf: np.ndarray,
+                 pos_ptr: np.ndarray, positions: np.ndarray, k1: float = 1.2, b: float = 0.75):
+        self.documents = documents
+        self.vocabulary = vocabulary
+        self.doc_lengths = doc_lengths
+        self.term_ptr = term_ptr
+        self.post_doc = post_doc
+        self.post_tf = post_tf
+        self.pos_ptr = pos_ptr
+        self.positions = positions
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def build(cls, documents: List[dict], field: str = "content") -> "DocumentIndex":
+        vocabulary = {}
+        term_ids, doc_ids, doc_lengths = [], [], []
+        for doc_id, document in enumerate(documents):
+            ids = [vocabulary.setdefault(term, len(vocabulary)) for term in tokenize(document.get(field, ""))]
+            term_ids.append(np.asarray(ids, dtype=np.int32))
+            doc_ids.append(np.full(len(ids), doc_id, dtype=np.int32))
+            doc_lengths.append(len(ids))
+
+        terms = np.concatenate(term_ids) if term_ids else np.zeros(0, dtype=np.int32)
+        docs = np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype=np.int32)
+        positions = np.concatenate([np.arange(n, dtype=np.int32) for n in doc_lengths]) if doc_lengths \
+            else np.zeros(0, dtype=np.int32)
+        # One stable sort groups every (term, document) pair with its positions in order
+        order = np.lexsort((positions, docs, terms))
+        terms, docs, positions = terms[order], docs[order], positions[order]
+
+        if len(terms):
+            starts = np.flatnonzero(np.r_[True, (terms[1:] != terms[:-1]) | (docs[1:] != docs[:-1])])
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        pos_ptr = np.r_[starts, len(terms)].astype(np.int64)
+        post_doc = docs[starts]
+        post_tf = np.diff(pos_ptr).astype(np.int32)
+        term_ptr = np.searchsorted(terms[starts], np.arange(len(vocabulary) + 1)).astype(np.int64)
+        metrics.incr("doc_index.builds")
+        return cls(documents, vocabulary, np.asarray(doc_lengths, dtype=np.int32),
+                   term_ptr, post_doc, post_tf, pos_ptr, positions)
+
+    _ARRAYS = ("doc_lengths", "term_ptr", "post_doc", "post_tf", "pos_ptr", "positions")
+
+    def save(self, path: str):
+        # Written to a temporary directory and renamed, so readers never see half an index
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        for name in self._ARRAYS:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_FORMAT_VERSION, "k1": self.k1, "b": self.b,
+                       "vocabulary": self.vocabulary, "documents": self.documents}, f, ensure_ascii=False)
+        shutil.rmtree(path, ignore_errors=True)  # an unreadable copy left behind
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another process saved the same index first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["DocumentIndex"]:
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != INDEX_FORMAT_VERSION:
+                return None
+            arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in cls._ARRAYS}
+        except (OSError, ValueError) as e:
+            print(f"Document index at {path} unreadable, rebuilding: {e}")
+            return None
+        return cls(meta["documents"], meta["vocabulary"], k1=meta["k1"], b=meta["b"], **arrays)
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray, int]:
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), 0
+        start, end = int(self.term_ptr[term_id]), int(self.term_ptr[term_id + 1])
+        return self.post_doc[start:end], self.post_tf[start:end], start
+
+    def _term_positions(self, term: str, doc_id: int) -> np.ndarray:
+        docs, _, offset = self._postings(term)
+        i = int(np.searchsorted(docs, doc_id))
+        if i == len(docs) or docs[i] != doc_id:
+            return np.zeros(0, dtype=np.int32)
+        posting = offset + i
+        return self.positions[self.pos_ptr[posting]:self.pos_ptr[posting + 1]]
+
+    def _phrase_docs(self, phrase: List[str]) -> np.ndarray:
+        """
+        Documents containing phrase as consecutive words. Every occurrence of
+        word i becomes the key (doc << 32 | position - i); keys shared by all
+        words mark phrase starts. Postings are already sorted by (doc, position),
+        so each word filters the keys with one binary search.
+        """
+        keys = []
+        for offset, term in enumerate(phrase):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                return np.zeros(0, dtype=np.int64)
+            start, end = int(self.term_ptr[term_id]), int(self.term_ptr[term_id + 1])
+            docs = np.repeat(np.asarray(self.post_doc[start:end], dtype=np.int64), self.post_tf[start:end])
+            positions = np.asarray(self.positions[self.pos_ptr[start]:self.pos_ptr[end]], dtype=np.int64) - offset
+            keep = positions >= 0  # a phrase can't start before the document does
+            keys.append((docs[keep] << 32) | positions[keep])
+        # Rarest word first keeps the surviving set small
+        keys.sort(key=len)
+        matches = keys[0]
+        for other in keys[1:]:
+            if len(matches) == 0:
+                break
+            found = np.searchsorted(other, matches)
+            found[found == len(other)] = 0
+            matches = matches[other[found] == matches]
+        return np.unique(matches >> 32)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Top k (doc_id, score) by BM25 over the query terms. Documents must
+        contain every "quoted phrase" in the query as consecutive words.
+        """
+        terms, phrases = parse_query(query)
+        n_docs = len(self.documents)
+        if not terms or n_docs == 0:
+            return []
+
+        scores = np.zeros(n_docs, dtype=np.float32)
+        matched = np.zeros(n_docs, dtype=bool)
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_doc_length, 1e-9))
+        for term in terms:
+            docs, tfs, _ = self._postings(term)
+            if len(docs) == 0:
+                continue
+            idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            # docs are unique within a term's postings, so fancy-index += is safe
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + length_norm[docs])
+            matched[docs] = True
+
+        candidates = np.flatnonzero(matched)
+        for phrase in phrases:
+            candidates = np.intersect1d(candidates, self._phrase_docs(phrase), assume_unique=True)
+        if len(candidates) == 0:
+            return []
+
+        if len(candidates) > k:
+            top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        else:
+            top = candidates
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in top]
+
+    def snippet(self, doc_id: int, query: str, field: str = "content", window: int = 40) -> str:
+        """
+        The window-word passage of the document with the most distinct query
+        terms, as markdown with every matching word in bold. The passage is
+        found from the index positions, so long filings are not rescanned.
+        """
+        terms, _ = parse_query(query)
+        hit_positions, hit_terms = [], []
+        for term_number, term in enumerate(terms):
+            positions = self._term_positions(term, doc_id)
+            hit_positions.append(np.asarray(positions, dtype=np.int64))
+            hit_terms.append(np.full(len(positions), term_number))
+        hit_positions = np.concatenate(hit_positions) if hit_positions else np.zeros(0, dtype=np.int64)
+        hit_terms = np.concatenate(hit_terms) if hit_terms else np.zeros(0, dtype=np.int64)
+
+        start = 0
+        if len(hit_positions):
+            order = np.argsort(hit_positions, kind="stable")
+            hit_positions, hit_terms = hit_positions[order], hit_terms[order]
+            ends = np.searchsorted(hit_positions, hit_positions + window)
+            best_score = -1
+            # A best window can always start on a hit
+            for i in range(min(len(hit_positions), 2000)):
+                score = len(set(hit_terms[i:ends[i]].tolist())) * window + (ends[i] - i)
+                if score > best_score:
+                    start, best_score = int(hit_positions[i]), score
+            start = max(0, start - window // 4)  # a little context before the first hit
+        return highlight(self.documents[doc_id].get(field, ""), terms, (start, start + window))
+
+
+def highlight(text: str, terms: List[str], span: Tuple[int, int] = None) -> str:
+    """
+    Markdown for text with every word whose stem is in terms in bold, and
+    everything else escaped so it renders literally. Matching runs on stems,
+    so it is case- and inflection-insensitive and keeps the text's own spelling.
+    span=(first, last) token numbers limits the output to that passage.
+    """
+    terms = set(terms)
+    first, last = span or (0, None)
+    parts = []
+    cursor = None
+    text_end = len(text)
+    for number, match in enumerate(_TOKEN_RE.finditer(text)):
+        if number < first:
+            continue
+        if last is not None and number >= last:
+            text_end = match.start()
+            break
+        if cursor is None:
+            cursor = match.start() if number else 0
+            if number:
+                parts.append("… ")
+        if stem(match.group().lower()) in terms:
+            parts.append(_escape_markdown(text[cursor:match.start()]))
+            parts.append(f"**{_escape_markdown(match.group())}**")
+            cursor = match.end()
+    if cursor is None:
+        return _escape_markdown(text) if first == 0 else ""
+    parts.append(_escape_markdown(text[cursor:text_end].rstrip() if text_end < len(text) else text[cursor:]))
+    if text_end < len(text):
+        parts.append(" …")
+    return "".join(parts)
+
+
+def corpus_fingerprint(documents: List[dict]) -> str:
+    digest = hashlib.sha256(str(INDEX_FORMAT_VERSION).encode("utf-8"))
+    for document in documents:
+        digest.update(json.dumps(document, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_FINGERPRINT_RE = re.compile(r"[0-9a-f]{16}")
+
+
+def prune_index_dir(index_dir: str, keep: int = None) -> List[str]:
+    """
+    Delete all but the keep most recently used indexes in index_dir (their
+    directory mtime is bumped on every load). Returns the fingerprints removed.
+    """
+    keep = DOC_INDEX_KEEP if keep is None else keep
+    try:
+        entries = [entry for entry in os.scandir(index_dir) if entry.is_dir() and _FINGERPRINT_RE.fullmatch(entry.name)]
+    except OSError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    removed = []
+    for entry in entries[max(keep, 1):]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+        removed.append(entry.name)
+    return removed
+
+
+def get_document_index(documents: List[dict], index_dir: str = None) -> DocumentIndex:
+    """
+    Process-wide index for a corpus. Loaded from index_dir when this exact corpus
+    was indexed before, otherwise built and saved there; indexes of corpora that
+    have since changed are then removed, keeping the DOC_INDEX_KEEP most recent.
+    """
+    fingerprint = corpus_fingerprint(documents)
+    with _indexes_lock:
+        index = _indexes.get(fingerprint)
+        if index is not None:
+            return index
+        index_dir = index_dir or DOC_INDEX_DIR
+        path = os.path.join(index_dir, fingerprint)
+        index = DocumentIndex.load(path) if os.path.isdir(path) else None
+        if index is None:
+            index = DocumentIndex.build(documents)
+            os.makedirs(index_dir, exist_ok=True)
+            index.save(path)
+            for removed in prune_index_dir(index_dir):
+                _indexes.pop(removed, None)
+        else:
+            try:
+                os.utime(path)  # marks it recently used for pruning
+            except OSError:
+                pass
+        _indexes[fingerprint] = index
+        return index
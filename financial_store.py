@@ -0,0 +1,392 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from local_store import CACHE_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+load_dotenv()
+
+FINANCIAL_STORE_DIR = os.getenv("FINANCIAL_STORE_DIR", os.path.join(CACHE_DIR, "financials"))
+
+# Money is in ₹ crore and shares in crore, so EPS comes out in ₹ per share
+QUARTERLY_COLUMNS = ["company", "period_end", "revenue", "net_profit", "shares_outstanding", "equity", "price"]
+DAILY_COLUMNS = ["company", "date", "close", "volume"]
+DERIVED_COLUMNS = ["quarter", "eps", "eps_ttm", "pe_ratio", "roe", "market_cap", "revenue_qoq", "net_profit_qoq"]
+
+# Accepted spellings in CSV headers, after lower-casing and squashing punctuation to "_"
+COLUMN_ALIASES = {
+    "company": ["company", "symbol", "ticker", "entity", "name"],
+    "period_end": ["period_end", "quarter_end", "period", "date", "as_of"],
+    "revenue": ["revenue", "revenue_cr", "total_revenue", "revenue_from_operations", "sales"],
+    "net_profit": ["net_profit", "net_profit_cr", "profit", "pat", "net_income", "profit_loss"],
+    "shares_outstanding": ["shares_outstanding", "shares", "shares_cr", "share_count"],
+    "equity": ["equity", "shareholders_equity", "total_equity", "net_worth"],
+    "price": ["price", "close", "close_price", "share_price"],
+    "date": ["date", "trade_date", "timestamp"],
+    "close": ["close", "close_price", "adj_close", "price"],
+    "volume": ["volume", "traded_volume", "qty"],
+}
+
+# xBRL-JSON (OIM) concepts mapped to quarterly columns; values in rupees are converted to crore
+XBRL_CONCEPTS = {
+    "ifrs-full:Revenue": "revenue",
+    "ifrs-full:RevenueFromContractsWithCustomers": "revenue",
+    "in-bse-fin:RevenueFromOperations": "revenue",
+    "ifrs-full:ProfitLoss": "net_profit",
+    "in-bse-fin:ProfitLossForPeriod": "net_profit",
+    "ifrs-full:Equity": "equity",
+    "ifrs-full:NumberOfSharesOutstanding": "shares_outstanding",
+}
+RUPEES_PER_CRORE = 1e7
+
+
+def _squash(name: str) -> str:
+    return re.sub(r"[^0-9a-z]+", "_", name.strip().lower()).strip("_")
+
+
+def _has_column(frame: pd.DataFrame, column: str) -> bool:
+    squashed = {_squash(name) for name in frame.columns}
+    return any(alias in squashed for alias in COLUMN_ALIASES[column])
+
+
+def _rename_columns(frame: pd.DataFrame, wanted: List[str]) -> pd.DataFrame:
+    available = {_squash(column): column for column in frame.columns}
+    renames = {}
+    for column in wanted:
+        for alias in COLUMN_ALIASES.get(column, [column]):
+            if alias in available and available[alias] not in renames:
+                renames[available[alias]] = column
+                break
+    frame = frame.rename(columns=renames)
+    missing = [column for column in wanted if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns {missing}; got {list(frame.columns)}")
+    return frame[wanted]
+
+
+def read_quarterly_csv(path: str) -> pd.DataFrame:
+    frame = pd.read_csv(path)
+    # Price and share count are optional in some exports; the metrics that need them come out NaN
+    for optional in ("price", "shares_outstanding", "equity"):
+        if not _has_column(frame, optional):
+            frame[optional] = np.nan
+    return _rename_columns(frame, QUARTERLY_COLUMNS)
+
+
+def read_daily_csv(path: str) -> pd.DataFrame:
+    frame = pd.read_csv(path)
+    if not _has_column(frame, "volume"):
+        frame["volume"] = 0
+    return _rename_columns(frame, DAILY_COLUMNS)
+
+
+def read_xbrl_json(path: str) -> pd.DataFrame:
+    """
+    Quarterly rows from an xBRL-JSON (OIM) export: duration facts become
+    revenue/net_profit for the period ending on their end date, instant facts
+    (equity, share count) land on their date. XML instance documents need
+    converting to xBRL-JSON first (e.g. with Arelle).
+    """
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    rows = {}
+    for fact in report.get("facts", {}).values():
+        dimensions = fact.get("dimensions", {})
+        column = XBRL_CONCEPTS.get(dimensions.get("concept"))
+        if column is None or fact.get("value") is None:
+            continue
+        period = dimensions.get("period", "")
+        end = pd.Timestamp(period.split("/")[-1])
+        if "/" in period:
+            start = pd.Timestamp(period.split("/")[0])
+            if (end - start).days > 100:
+                continue  # half-year and annual totals would double count
+        # Period ends are exclusive instants at midnight; the quarter ends the day before
+        if end.hour == 0 and end.minute == 0 and end.day == 1:
+            end -= pd.Timedelta(days=1)
+        value = float(fact["value"])
+        if dimensions.get("unit", "").startswith("iso4217:"):
+            value /= RUPEES_PER_CRORE
+        elif column == "shares_outstanding":
+            value /= RUPEES_PER_CRORE  # counts are stored in crore too
+        entity = dimensions.get("entity", "").split(":")[-1]
+        rows.setdefault((entity, end.normalize()), {})[column] = value
+    frame = pd.DataFrame(
+        [{"company": entity, "period_end": end, **values} for (entity, end), values in rows.items()],
+        columns=QUARTERLY_COLUMNS,
+    )
+    return frame
+
+
+def compute_metrics(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add quarter labels and derived metrics to quarterly rows sorted by
+    (company, period_end). Everything runs on whole columns; windows never
+    cross from one company into the next.
+      eps            net_profit / shares_outstanding
+      eps_ttm        sum of the last four quarters' EPS
+      pe_ratio       price / eps_ttm (NaN unless earnings are positive)
+      roe            trailing-four-quarter net profit / equity, in %
+      market_cap     price * shares_outstanding
+      *_qoq          % change from the company's previous quarter
+    """
+    frame = frame.copy()
+    company = frame["company"].to_numpy()
+    n = len(frame)
+    # Position of each row within its company's run, used to mask cross-company windows
+    starts = np.r_[True, company[1:] != company[:-1]] if n else np.zeros(0, dtype=bool)
+    run_start = np.maximum.accumulate(np.where(starts, np.arange(n), 0)) if n else np.zeros(0, dtype=int)
+    offset = np.arange(n) - run_start
+
+    def lagged(values: np.ndarray, lag: int) -> np.ndarray:
+        shifted = np.full(n, np.nan)
+        if n > lag:
+            shifted[lag:] = values[:-lag]
+        shifted[offset < lag] = np.nan
+        return shifted
+
+    period_end = pd.to_datetime(frame["period_end"])
+    quarter_number = (period_end.dt.year * 4 + period_end.dt.quarter).to_numpy()
+
+    def trailing_sum(values: np.ndarray, window: int) -> np.ndarray:
+        # NaN when a value in the window is missing or the window skips a quarter
+        missing = np.isnan(values)
+        cumulative = np.r_[0.0, np.cumsum(np.where(missing, 0.0, values))]
+        missing_count = np.r_[0, np.cumsum(missing)]
+        result = np.full(n, np.nan)
+        if n >= window:
+            totals = cumulative[window:] - cumulative[:-window]
+            gaps = missing_count[window:] - missing_count[:-window]
+            spans = quarter_number[window - 1:] - quarter_number[:n - window + 1]
+            result[window - 1:] = np.where((gaps == 0) & (spans == window - 1), totals, np.nan)
+        result[offset < window - 1] = np.nan
+        return result
+
+    frame["quarter"] = "Q" + period_end.dt.quarter.astype(str) + " " + period_end.dt.year.astype(str)
+
+    revenue = frame["revenue"].to_numpy(dtype=float)
+    net_profit = frame["net_profit"].to_numpy(dtype=float)
+    shares = frame["shares_outstanding"].to_numpy(dtype=float)
+    equity = frame["equity"].to_numpy(dtype=float)
+    price = frame["price"].to_numpy(dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eps = np.where(shares > 0, net_profit / shares, np.nan)
+        eps_ttm = trailing_sum(eps, 4)
+        frame["eps"] = eps
+        frame["eps_ttm"] = eps_ttm
+        frame["pe_ratio"] = np.where(eps_ttm > 0, price / eps_ttm, np.nan)
+        frame["roe"] = np.where(equity > 0, trailing_sum(net_profit, 4) / equity * 100, np.nan)
+        frame["market_cap"] = price * shares
+        previous_revenue = lagged(revenue, 1)
+        previous_profit = lagged(net_profit, 1)
+        frame["revenue_qoq"] = np.where(previous_revenue != 0, (revenue / previous_revenue - 1) * 100, np.nan)
+        frame["net_profit_qoq"] = np.where(previous_profit > 0, (net_profit / previous_profit - 1) * 100, np.nan)
+    return frame
+
+
+def _write_arrow(frame: pd.DataFrame, path: str):
+    # Uncompressed Arrow IPC, so readers can memory-map it without copying
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=64 * 1024)
+    os.replace(tmp_path, path)
+
+
+def _company_ranges(companies: np.ndarray) -> Dict[str, List[int]]:
+    if len(companies) == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, companies[1:] != companies[:-1]])
+    stops = np.r_[starts[1:], len(companies)]
+    return {str(companies[start]): [int(start), int(stop)] for start, stop in zip(starts, stops)}
+
+
+class FinancialStore:
+    """
+    Columnar store of quarterly fundamentals and daily prices for many companies.
+    Each table is one Arrow IPC file sorted by (company, date), plus an index of
+    each company's row range. Reads memory-map the files, so opening the store
+    is cheap and a query only touches the pages of the rows and columns it
+    returns; derived metrics are computed once at ingest.
+    """
+    def __init__(self, path: str = None):
+        if pa is None:
+            raise ImportError("pyarrow is required for the financial store")
+        self.path = path or FINANCIAL_STORE_DIR
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._ranges = {}
+        self._loaded_mtime = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.arrow")
+
+    def _index_file(self) -> str:
+        return os.path.join(self.path, "index.json")
+
+    def _open(self):
+        # Remapped whenever an ingest (from any process) rewrote the index
+        index_file = self._index_file()
+        mtime = os.path.getmtime(index_file) if os.path.exists(index_file) else None
+        with self._lock:
+            if mtime == self._loaded_mtime:
+                return
+            tables = {}
+            for name in ("quarterly", "daily"):
+                if os.path.exists(self._file(name)):
+                    tables[name] = pa.ipc.open_file(pa.memory_map(self._file(name), "r")).read_all()
+            ranges = {}
+            if mtime is not None:
+                with open(index_file, encoding="utf-8") as f:
+                    ranges = json.load(f)
+            self._tables, self._ranges, self._loaded_mtime = tables, ranges, mtime
+
+    def _write_index(self):
+        ranges = {}
+        for name in ("quarterly", "daily"):
+            if os.path.exists(self._file(name)):
+                table = pa.ipc.open_file(pa.memory_map(self._file(name), "r")).read_all()
+                ranges[name] = _company_ranges(table.column("company").to_numpy(zero_copy_only=False))
+        tmp_path = f"{self._index_file()}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(ranges, f)
+        os.replace(tmp_path, self._index_file())
+
+    def _merge(self, name: str, frame: pd.DataFrame, key: str) -> pd.DataFrame:
+        # New rows replace stored rows for the same (company, date)
+        self._open()
+        existing = self._tables.get(name)
+        if existing is not None:
+            stored = existing.to_pandas()
+            frame = pd.concat([stored[frame.columns.intersection(stored.columns)], frame], ignore_index=True)
+        frame[key] = pd.to_datetime(frame[key]).dt.normalize()
+        frame["company"] = frame["company"].astype(str)
+        frame = frame.drop_duplicates(["company", key], keep="last")
+        return frame.sort_values(["company", key], kind="stable").reset_index(drop=True)
+
+    def ingest_quarterly(self, frame: pd.DataFrame) -> int:
+        frame = self._merge("quarterly", frame[QUARTERLY_COLUMNS], "period_end")
+        _write_arrow(compute_metrics(frame), self._file("quarterly"))
+        self._write_index()
+        return len(frame)
+
+    def ingest_daily(self, frame: pd.DataFrame) -> int:
+        frame = self._merge("daily", frame[DAILY_COLUMNS], "date")
+        _write_arrow(frame, self._file("daily"))
+        self._write_index()
+        return len(frame)
+
+    def ingest_file(self, path: str, kind: str = None) -> int:
+        """
+        Ingest a CSV (kind "quarterly" or "daily"; guessed from the header when
+        omitted) or an xBRL-JSON export. Returns the stored row count.
+        """
+        if path.endswith(".json"):
+            return self.ingest_quarterly(read_xbrl_json(path))
+        if kind is None:
+            header = {_squash(column) for column in pd.read_csv(path, nrows=0).columns}
+            kind = "quarterly" if any(alias in header for alias in COLUMN_ALIASES["revenue"]) else "daily"
+        if kind == "quarterly":
+            return self.ingest_quarterly(read_quarterly_csv(path))
+        return self.ingest_daily(read_daily_csv(path))
+
+    def companies(self) -> List[str]:
+        self._open()
+        return sorted(self._ranges.get("quarterly", {}))
+
+    def _slice(self, name: str, company: str, date_column: str, columns: Optional[List[str]],
+               start=None, end=None, last: int = None) -> pd.DataFrame:
+        self._open()
+        table = self._tables.get(name)
+        row_range = self._ranges.get(name, {}).get(company)
+        if table is None or row_range is None:
+            return pd.DataFrame(columns=columns or [])
+        rows = table.slice(row_range[0], row_range[1] - row_range[0])  # zero-copy view of the mapped file
+        if start is not None or end is not None:
+            # Rows are sorted by date within a company, so the range is two binary searches
+            dates = rows.column(date_column).to_numpy().astype("datetime64[ns]")
+            lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), "left"))
+            hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), "right"))
+            rows = rows.slice(lo, max(hi - lo, 0))
+        if last:
+            rows = rows.slice(max(rows.num_rows - last, 0))
+        if columns:
+            rows = rows.select(columns)
+        return rows.to_pandas()
+
+    def quarterly(self, company: str, columns: List[str] = None, start=None, end=None,
+                  last: int = None) -> pd.DataFrame:
+        return self._slice("quarterly", company, "period_end", columns, start, end, last)
+
+    def daily(self, company: str, columns: List[str] = None, start=None, end=None) -> pd.DataFrame:
+        return self._slice("daily", company, "date", columns, start, end)
+
+    def summary(self, company: str) -> Optional[dict]:
+        """
+        The latest quarter in the shape of the Financial Summary page's metrics.
+        """
+        latest = self.quarterly(company, last=1)
+        if latest.empty:
+            return None
+        row = latest.iloc[0]
+
+        def rounded(value, digits=2):
+            return None if pd.isna(value) else round(float(value), digits)
+
+        def crore(value):
+            return "N/A" if pd.isna(value) else f"₹{value:.0f} Crore"
+
+        return {
+            'Revenue': crore(row['revenue']),
+            'Net Profit': crore(row['net_profit']),
+            'Market Cap': crore(row['market_cap']),
+            'EPS': rounded(row['eps_ttm']),
+            'P/E Ratio': rounded(row['pe_ratio']),
+            'ROE (%)': rounded(row['roe']),
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_financial_store() -> Optional[FinancialStore]:
+    """
+    Process-wide store under FINANCIAL_STORE_DIR, or None without pyarrow.
+    """
+    global _store
+    if pa is None:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = FinancialStore()
+        return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest CSV or xBRL-JSON exports into the financial store")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--kind", choices=["quarterly", "daily"], help="CSV contents; guessed from the header by default")
+    parser.add_argument("--store", default=None, help=f"store directory (default {FINANCIAL_STORE_DIR})")
+    args = parser.parse_args()
+
+    store = FinancialStore(args.store)
+    for file_path in args.files:
+        print(f"{file_path}: {store.ingest_file(file_path, args.kind)} rows stored")
@@ -0,0 +1,481 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_DIR = os.getenv("LOCAL_CACHE_DIR", ".cache")
+
+TRACKING_PARAMS = {"gclid", "fbclid", "ocid", "ref", "ref_src", "cmpid"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of an article URL: lower-case scheme/host, no default port,
+    fragment or tracking parameters, sorted query string, no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == "http" and parts.port == 80) and not (scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def connect(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ArticleCache:
+    """
+    On-disk cache of article bodies keyed by the hash of the normalized URL.
+    Bodies are zlib-compressed in SQLite. Entries expire after ttl seconds, failed
+    fetches are remembered for negative_ttl seconds, and the least recently used
+    entries are evicted once the stored bodies exceed max_bytes.
+    """
+    def __init__(self, path: str = None, ttl: float = 7 * 24 * 3600, negative_ttl: float = 30 * 60,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.path = path or os.path.join(CACHE_DIR, "articles.sqlite3")
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._stored_bytes = None
+        self._conn = connect(self.path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS articles (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body BLOB,
+                size INTEGER NOT NULL,
+                ok INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS articles_last_access ON articles(last_access)")
+
+    def get(self, url: str) -> Optional[str]:
+        """
+        Cached text for url, "" for a remembered failure, or None on a miss/expired entry.
+        """
+        key = url_key(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, ok, fetched_at FROM articles WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            body, ok, fetched_at = row
+            if now - fetched_at > (self.ttl if ok else self.negative_ttl):
+                self._delete(key)
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE articles SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return zlib.decompress(body).decode("utf-8") if ok else ""
+
+    def put(self, url: str, text: str):
+        self._store(url, zlib.compress(text.encode("utf-8"), 6), ok=True)
+
+    def put_failure(self, url: str):
+        self._store(url, b"", ok=False)
+
+    def _store(self, url: str, body: bytes, ok: bool):
+        key = url_key(url)
+        now = time.time()
+        with self._lock:
+            self._total_bytes()
+            self._delete(key)
+            self._conn.execute(
+                "INSERT INTO articles (key, url, body, size, ok, fetched_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, normalize_url(url), body, len(body), int(ok), now, now),
+            )
+            self._stored_bytes += len(body)
+            if self._stored_bytes > self.max_bytes:
+                self._evict()
+
+    def _delete(self, key: str):
+        row = self._conn.execute("SELECT size FROM articles WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM articles WHERE key = ?", (key,))
+            if self._stored_bytes is not None:
+                self._stored_bytes -= row[0]
+
+    def _total_bytes(self) -> int:
+        # Running total avoids a SUM over the table on every insert
+        if self._stored_bytes is None:
+            self._stored_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+        return self._stored_bytes
+
+    def _evict(self):
+        # Drop least recently used entries until the cache is back under 90% of max_bytes
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM articles ORDER BY last_access"):
+            if self._stored_bytes - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM articles WHERE key = ?", victims)
+        self._stored_bytes -= freed
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM articles WHERE (ok = 1 AND fetched_at < ?) OR (ok = 0 AND fetched_at < ?)",
+                (now - self.ttl, now - self.negative_ttl),
+            )
+            self._stored_bytes = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            stored = self._total_bytes()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": stored,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_article_cache = None
+_article_cache_lock = threading.Lock()
+
+
+def get_article_cache() -> Optional[ArticleCache]:
+    """
+    Process-wide article cache, created on first use. Returns None when
+    ARTICLE_CACHE_ENABLED=0.
+    """
+    global _article_cache
+    if os.getenv("ARTICLE_CACHE_ENABLED", "1") == "0":
+        return None
+    with _article_cache_lock:
+        if _article_cache is None:
+            _article_cache = ArticleCache(
+                path=os.getenv("ARTICLE_CACHE_PATH"),
+                ttl=float(os.getenv("ARTICLE_CACHE_TTL", 7 * 24 * 3600)),
+                negative_ttl=float(os.getenv("ARTICLE_CACHE_NEGATIVE_TTL", 30 * 60)),
+                max_bytes=int(os.getenv("ARTICLE_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+            )
+        return _article_cache
+
+
+class SearchCache:
+    """
+    Per-term search results ({title: link}) with a TTL, so a term searched
+    recently is not sent to SerpAPI again. key identifies the term together
+    with the search parameters.
+    """
+    def __init__(self, path: str = None, ttl: float = 4 * 3600):
+        self.path = path or os.path.join(CACHE_DIR, "search.sqlite3")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS search_results (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, fetched_at FROM search_results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, results: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results (key, payload, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(results), time.time()),
+            )
+
+    def invalidate(self, key: str = None):
+        with self._lock:
+            if key is None:
+                self._conn.execute("DELETE FROM search_results")
+            else:
+                self._conn.execute("DELETE FROM search_results WHERE key = ?", (key,))
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """
+    Process-wide search result cache. Returns None when SEARCH_CACHE_TTL=0.
+    """
+    global _search_cache
+    ttl = float(os.getenv("SEARCH_CACHE_TTL", 4 * 3600))
+    if ttl <= 0:
+        return None
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache(path=os.getenv("SEARCH_CACHE_PATH"), ttl=ttl)
+        return _search_cache
+
+
+class ImpactCache:
+    """
+    Impact-analysis responses keyed by (company, article hash, company_info hash,
+    prompt version). Rows from other prompt versions are dropped on open, entries
+    expire after ttl seconds and the least recently used rows are evicted beyond
+    max_entries.
+    """
+    def __init__(self, prompt_version: str, path: str = None, ttl: float = 30 * 24 * 3600,
+                 max_entries: int = 50000):
+        self.path = path or os.path.join(CACHE_DIR, "impacts.sqlite3")
+        self.prompt_version = prompt_version
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS impacts (
+                key TEXT PRIMARY KEY,
+                prompt_version TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS impacts_last_access ON impacts(last_access)")
+        self._conn.execute("DELETE FROM impacts WHERE prompt_version != ?", (prompt_version,))
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM impacts").fetchone()[0]
+
+    @staticmethod
+    def make_key(company_name: str, text: str, company_info: str, prompt_version: str) -> str:
+        parts = [
+            company_name.strip().lower(),
+            hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            hashlib.sha256(company_info.encode("utf-8")).hexdigest(),
+            prompt_version,
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM impacts WHERE key = ? AND prompt_version = ?",
+                (key, self.prompt_version),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM impacts WHERE key = ?", (key,))
+                self._entries -= 1
+                return None
+            self._conn.execute("UPDATE impacts SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, response: dict):
+        now = time.time()
+        with self._lock:
+            existed = self._conn.execute("SELECT 1 FROM impacts WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO impacts (key, prompt_version, payload, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, self.prompt_version, json.dumps(response, ensure_ascii=False, default=str), now, now),
+            )
+            if not existed:
+                self._entries += 1
+            if self._entries > self.max_entries:
+                overflow = self._entries - int(self.max_entries * 0.9)
+                self._conn.execute(
+                    "DELETE FROM impacts WHERE key IN (SELECT key FROM impacts ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+                self._entries -= overflow
+
+    def invalidate(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM impacts")
+            self._entries = 0
+
+
+_impact_caches = {}
+_impact_cache_lock = threading.Lock()
+
+
+def get_impact_cache(prompt_version: str) -> Optional[ImpactCache]:
+    """
+    Process-wide impact cache for the given prompt version. Returns None when
+    IMPACT_CACHE_ENABLED=0.
+    """
+    if os.getenv("IMPACT_CACHE_ENABLED", "1") == "0":
+        return None
+    with _impact_cache_lock:
+        if prompt_version not in _impact_caches:
+            _impact_caches[prompt_version] = ImpactCache(
+                prompt_version,
+                path=os.getenv("IMPACT_CACHE_PATH"),
+                ttl=float(os.getenv("IMPACT_CACHE_TTL", 30 * 24 * 3600)),
+                max_entries=int(os.getenv("IMPACT_CACHE_MAX_ENTRIES", 50000)),
+            )
+        return _impact_caches[prompt_version]
+
+
+class LinkStore:
+    """
+    Local mirror of the per-term search links kept in MongoDB, used when Mongo is
+    unreachable. Same layout: one row per (term, article) and a refresh time per term.
+    """
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(CACHE_DIR, "links.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS term_articles (
+                term TEXT NOT NULL,
+                url_key TEXT NOT NULL,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (term, url_key)
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS term_refresh (
+                term TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+
+    def save_titles_links(self, titles_links: dict, fetched_at: float = None):
+        fetched_at = fetched_at or time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for term, links in titles_links.items():
+                    self._conn.execute("DELETE FROM term_articles WHERE term = ?", (term,))
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO term_articles (term, url_key, title, url) VALUES (?, ?, ?, ?)",
+                        [(term, url_key(url), title, url) for title, url in links.items()],
+                    )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO term_refresh (term, fetched_at) VALUES (?, ?)", (term, fetched_at)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def read_titles_links(self, terms: list) -> tuple:
+        terms = list(terms)
+        if not terms:
+            return {}, {}
+        placeholders = ",".join("?" * len(terms))
+        with self._lock:
+            fetched_at = dict(self._conn.execute(
+                f"SELECT term, fetched_at FROM term_refresh WHERE term IN ({placeholders})", terms
+            ).fetchall())
+            rows = self._conn.execute(
+                f"SELECT term, title, url FROM term_articles WHERE term IN ({placeholders})", terms
+            ).fetchall()
+        titles_links = {term: {} for term in fetched_at}
+        for term, title, url in rows:
+            titles_links.setdefault(term, {})[title] = url
+        return titles_links, fetched_at
+
+
+_link_store = None
+_link_store_lock = threading.Lock()
+
+
+def get_link_store() -> LinkStore:
+    global _link_store
+    with _link_store_lock:
+        if _link_store is None:
+            _link_store = LinkStore(path=os.getenv("LINK_STORE_PATH"))
+        return _link_store
+
+
+class EffectMapStore:
+    """
+    Local mirror of the precomputed effect maps kept in MongoDB: one row per
+    company holding its latest effect map as JSON.
+    """
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(CACHE_DIR, "effect_maps.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS effect_maps (
+                company TEXT PRIMARY KEY,
+                computed_at REAL NOT NULL,
+                payload TEXT NOT NULL
+            )"""
+        )
+
+    @staticmethod
+    def company_key(company: str) -> str:
+        return company.strip().lower()
+
+    def save(self, company: str, effect_map: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO effect_maps (company, computed_at, payload) VALUES (?, ?, ?)",
+                (self.company_key(company), effect_map["computed_at"], json.dumps(effect_map, ensure_ascii=False)),
+            )
+
+    def read(self, company: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM effect_maps WHERE company = ?", (self.company_key(company),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+_effect_map_store = None
+_effect_map_store_lock = threading.Lock()
+
+
+def get_effect_map_store() -> EffectMapStore:
+    global _effect_map_store
+    with _effect_map_store_lock:
+        if _effect_map_store is None:
+            _effect_map_store = EffectMapStore(path=os.getenv("EFFECT_MAP_STORE_PATH"))
+        return _effect_map_store
@@ -0,0 +1,299 @@
+import bisect
+import contextlib
+import cProfile
+import io
+import json
+import math
+import os
+import pstats
+import re
+import threading
+import time
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# Upper bounds of the histogram buckets, in seconds for timings
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+PROFILE_MODE = os.getenv("PROFILE_MODE", "")  # "", "cprofile" or "pyinstrument"
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "40"))  # functions listed in a cProfile report
+
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+_PROMETHEUS_INVALID = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def series_key(name: str, labels: dict = None) -> str:
+    """
+    The key a metric is stored and exported under: the dotted name, plus the
+    labels in Prometheus syntax when there are any, e.g. fetch.host_seconds{host="a.com"}.
+    """
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def split_series_key(key: str) -> tuple:
+    name, _, labels = key.partition("{")
+    return name, dict(_LABEL_RE.findall(labels))
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: constant memory however many values are observed.
+    Quantiles are interpolated within the bucket they fall in.
+    """
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else self.min
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def merge(self, state: dict):
+        if tuple(state["buckets"]) != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, state["counts"])]
+        self.count += state["count"]
+        self.sum += state["sum"]
+        if state["count"]:
+            self.min = min(self.min, state["min"])
+            self.max = max(self.max, state["max"])
+
+    def state(self) -> dict:
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "count": self.count,
+                "sum": self.sum, "min": self.min, "max": self.max}
+
+    def summary(self) -> dict:
+        return {"count": self.count, "sum": self.sum, "min": self.min, "max": self.max,
+                "mean": self.sum / self.count, "p50": self.quantile(0.5), "p95": self.quantile(0.95)}
+
+
+class Metrics:
+    """
+    Thread-safe counters and histograms shared by the pipeline stages.
+    Names are dotted, e.g. "search.cache_hits" or "fetch.seconds", and can carry
+    labels, e.g. observe("fetch.host_seconds", 0.2, labels={"host": "a.com"}).
+    Everything can be exported as JSON or in the Prometheus text format, and
+    dump()/merge() carry a worker process's metrics back to its parent.
+    Modules can register gauges derived from their counters (e.g. ratios),
+    which are computed whenever metrics are exported.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._profiles = {}
+        self._gauge_sources = []
+
+    def incr(self, name: str, value: float = 1, labels: dict = None):
+        key = series_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: dict = None, buckets: tuple = None):
+        # A series keeps the buckets of its first observation
+        key = series_key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets or LATENCY_BUCKETS)
+            histogram.observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Observe the seconds spent in the with block, also when it raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels=labels)
+
+    def register_gauges(self, source):
+        # source() returns {series_key: value}
+        with self._lock:
+            self._gauge_sources.append(source)
+
+    def gauges(self) -> dict:
+        with self._lock:
+            sources = list(self._gauge_sources)
+        gauges = {}
+        for source in sources:
+            gauges.update(source())
+        return gauges
+
+    def counter(self, name: str, labels: dict = None) -> float:
+        with self._lock:
+            return self._counters.get(series_key(name, labels), 0)
+
+    def snapshot(self, prefix: str = "") -> dict:
+        with self._lock:
+            counters = {k: v for k, v in self._counters.items() if k.startswith(prefix)}
+            observations = {
+                k: h.summary() for k, h in self._histograms.items() if k.startswith(prefix) and h.count
+            }
+        return {"counters": counters, "observations": observations}
+
+    def dump(self, prefix: str = "") -> dict:
+        """
+        Full state (histogram buckets included) in a JSON-serializable form.
+        """
+        with self._lock:
+            return {
+                "counters": {k: v for k, v in self._counters.items() if k.startswith(prefix)},
+                "histograms": {k: h.state() for k, h in self._histograms.items() if k.startswith(prefix)},
+            }
+
+    def merge(self, state: dict):
+        # Add the counters and histograms of a dump(), e.g. from a worker process
+        with self._lock:
+            for key, value in state.get("counters", {}).items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, histogram_state in state.get("histograms", {}).items():
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(histogram_state["buckets"])
+                histogram.merge(histogram_state)
+
+    def to_json(self, prefix: str = "") -> str:
+        snapshot = self.snapshot(prefix)
+        snapshot["gauges"] = {k: v for k, v in self.gauges().items() if k.startswith(prefix)}
+        snapshot["profiles"] = self.profiles()
+        return json.dumps(snapshot, indent=2, sort_keys=True)
+
+    def to_prometheus(self, namespace: str = "findashboard") -> str:
+        """
+        Prometheus text exposition format: counters as <name>_total, gauges as
+        <name>, histograms as cumulative <name>_bucket{le=...}, <name>_sum and
+        <name>_count.
+        """
+        state = self.dump()
+        lines = []
+        typed = set()
+
+        def metric_name(name):
+            return _PROMETHEUS_INVALID.sub("_", f"{namespace}_{name}" if namespace else name)
+
+        def label_text(labels):
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else ""
+
+        # Every series of a metric has to be listed together, so keys sort by their bare name
+        for key in sorted(state["counters"], key=lambda key: split_series_key(key)[0]):
+            name, labels = split_series_key(key)
+            name = metric_name(name) + "_total"
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{label_text(labels)} {state['counters'][key]:g}")
+
+        gauges = self.gauges()
+        for key in sorted(gauges, key=lambda key: split_series_key(key)[0]):
+            name, labels = split_series_key(key)
+            name = metric_name(name)
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{label_text(labels)} {gauges[key]:g}")
+
+        for key in sorted(state["histograms"], key=lambda key: split_series_key(key)[0]):
+            name, labels = split_series_key(key)
+            histogram = state["histograms"][key]
+            name = metric_name(name)
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(histogram["buckets"] + ["+Inf"], histogram["counts"]):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                lines.append(f"{name}_bucket{label_text({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{name}_sum{label_text(labels)} {histogram['sum']:g}")
+            lines.append(f"{name}_count{label_text(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        # .prom/.txt files get the Prometheus format, anything else JSON
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    @contextlib.contextmanager
+    def profiled(self, name: str, mode: str = None):
+        """
+        Profile the with block with cProfile or pyinstrument (mode defaults to
+        PROFILE_MODE; empty does nothing) and keep the report under name. Only
+        the calling thread is profiled; time spent waiting on worker threads
+        shows up as waits.
+        """
+        mode = PROFILE_MODE if mode is None else mode
+        if mode == "pyinstrument" and pyinstrument is None:
+            print("pyinstrument is not installed, profiling with cProfile")
+            mode = "cprofile"
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_TOP)
+                self._save_profile(name, mode, stream.getvalue())
+        elif mode == "pyinstrument":
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                self._save_profile(name, mode, profiler.output_text(unicode=True))
+        else:
+            yield
+
+    def _save_profile(self, name: str, mode: str, report: str):
+        with self._lock:
+            self._profiles[name] = {"mode": mode, "created_at": time.time(), "report": report}
+
+    def profiles(self) -> dict:
+        with self._lock:
+            return dict(self._profiles)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._profiles.clear()
+
+
+metrics = Metrics()
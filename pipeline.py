@@ -0,0 +1,193 @@
+import concurrent.futures
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterator
+
+from dedup import NearDuplicateIndex
+from metrics import metrics
+from utils import filter_relevant, iter_article_texts
+
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+
+_DONE = object()
+
+
+class StageError(Exception):
+    """
+    A pipeline stage's failure, passed down its queue so the consuming thread
+    can raise or report it instead of mistaking it for a normal end.
+    """
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"{stage} failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def _run_in_thread(produce, name: str) -> queue.Queue:
+    """
+    Run produce(put) on a daemon thread and return the queue it fills; the
+    queue ends with _DONE even when produce fails, preceded by a StageError
+    when it does.
+    """
+    output = queue.Queue()
+
+    def run():
+        try:
+            produce(output.put)
+        except Exception as e:
+            print(f"Pipeline stage {name} failed: {e}")
+            # A failure relayed from an earlier stage keeps its own stage name
+            output.put(e if isinstance(e, StageError) else StageError(name, e))
+        finally:
+            output.put(_DONE)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return output
+
+
+def iter_relevant_articles(titles_links: Dict[str, Dict[str, str]], threshold: float = None,
+                           mode: str = None, max_batch: int = 16) -> Iterator[tuple]:
+    """
+    Fetch and relevance stages: yield (term, title, url, text) for relevant articles
+    as they arrive. Fetching runs ahead on its own thread; whatever has been
+    fetched while the previous batch was being scored is scored together. A
+    fetch failure is raised as a StageError once the articles before it are out.
+    """
+    def fetch(put):
+        for item in iter_article_texts(titles_links, mode=mode):
+            put(item)
+
+    fetched = _run_in_thread(fetch, "pipeline-fetch")
+    finished = False
+    while not finished:
+        batch = [fetched.get()]
+        while len(batch) < max_batch:
+            try:
+                batch.append(fetched.get_nowait())
+            except queue.Empty:
+                break
+        if batch[-1] is _DONE:
+            batch.pop()
+            finished = True
+        failures = [item for item in batch if isinstance(item, StageError)]
+        batch = [item for item in batch if not isinstance(item, StageError)]
+
+        by_term = {}
+        for term, title, url, text in batch:
+            by_term.setdefault(term, []).append((title, url, text))
+        for term, articles in by_term.items():
+            metrics.incr("pipeline.articles_fetched", len(articles))
+            relevant = filter_relevant([text for _, _, text in articles], term, threshold)
+            for (title, url, text), is_relevant in zip(articles, relevant):
+                if is_relevant:
+                    metrics.incr("pipeline.articles_relevant")
+                    yield (term, title, url, text)
+        if failures:
+            raise failures[0]
+
+
+def stream_effect_map(generator, client, company_name: str, company_info: str,
+                      titles_links: Dict[str, Dict[str, str]], mode: str = None) -> Iterator[dict]:
+    """
+    Search results in, impact events out. Articles are fetched, filtered,
+    collapsed with near-duplicates already seen, and sent to
+    generator.request_impact as soon as each is ready. Events are yielded in
+    completion order:
+      {"type": "impact", "impact": {..., "sources": [urls]}}   a non-neutral impact
+      {"type": "sources", "title": ..., "sources": [urls]}    more copies of an already shown story
+      {"type": "analyzed", "title": ...}                      any finished analysis (neutral/failed too)
+      {"type": "error", "stage": ..., "error": message}       fetching or filtering failed; articles
+                                                              already submitted still finish
+      {"type": "done", "articles": n, "analyzed": n, "impacts": n, "duplicates": n,
+       "time_to_first_result": s or None, "total_time": s}
+    """
+    start = time.perf_counter()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=generator.max_in_flight)
+    results = queue.Queue()
+    submitted = {"count": 0}
+
+    def analyze(title, url, text, term):
+        try:
+            raw_response = generator.request_impact(client, company_name, company_info, title, text, term=term)
+        except Exception as e:
+            print(f"Impact analysis failed for '{title}': {e}")
+            raw_response = {"Error": str(e)}
+        results.put(("analysis", title, url, raw_response))
+
+    def feed(put):
+        seen_titles = set()
+        # Syndicated copies of one wire story go to the LLM once
+        near_duplicates = NearDuplicateIndex(threshold=DEDUP_THRESHOLD)
+        for term, title, url, text in iter_relevant_articles(titles_links, mode=mode):
+            # The same headline can surface under several terms; analyze it once
+            if title in seen_titles or text == "":
+                continue
+            seen_titles.add(title)
+            representative = near_duplicates.add(title, text)
+            if representative is not None:
+                results.put(("duplicate", representative, url, None))
+                continue
+            submitted["count"] += 1
+            executor.submit(analyze, title, url, text, term)
+
+    feeder = _run_in_thread(feed, "pipeline-feed")
+    analyzed = 0
+    impacts = 0
+    duplicates = 0
+    first_result = None
+    feeding = True
+    extra_sources = {}  # representative title -> duplicate urls
+    shown_urls = {}     # representative title -> its own url, once yielded as an impact
+    try:
+        while feeding or analyzed < submitted["count"] or not results.empty():
+            if feeding:
+                try:
+                    item = feeder.get_nowait()
+                except queue.Empty:
+                    item = None
+                if item is _DONE:
+                    feeding = False
+                    continue
+                if isinstance(item, StageError):
+                    metrics.incr("pipeline.errors", labels={"stage": item.stage})
+                    yield {"type": "error", "stage": item.stage, "error": str(item.error)}
+                    continue
+            try:
+                kind, title, url, raw_response = results.get(timeout=0.05)
+            except queue.Empty:
+                continue
+
+            if kind == "duplicate":
+                duplicates += 1
+                extra_sources.setdefault(title, []).append(url)
+                if title in shown_urls:
+                    yield {"type": "sources", "title": title, "sources": [shown_urls[title]] + extra_sources[title]}
+                continue
+
+            analyzed += 1
+            yield {"type": "analyzed", "title": title}
+            impact = generator.to_impact(title, raw_response)
+            if impact is not None:
+                impacts += 1
+                shown_urls[title] = url
+                impact["sources"] = [url] + extra_sources.get(title, [])
+                if first_result is None:
+                    first_result = time.perf_counter() - start
+                    metrics.observe("pipeline.time_to_first_result", first_result)
+                yield {"type": "impact", "impact": impact}
+    finally:
+        executor.shutdown(wait=False)
+
+    total_time = time.perf_counter() - start
+    metrics.observe("pipeline.total_time", total_time)
+    yield {
+        "type": "done",
+        "articles": submitted["count"],
+        "analyzed": analyzed,
+        "impacts": impacts,
+        "duplicates": duplicates,
+        "time_to_first_result": first_result,
+        "total_time": total_time,
+    }
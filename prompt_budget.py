@@ -0,0 +1,112 @@
+import functools
+import math
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'“‘(])|\n+")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the to was were will with "
+    "this these those which who whom into than then also but not no can could would should may might".split()
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")  # gpt-4o family
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Token count with the gpt-4o tokenizer, or a 4-characters-per-token estimate
+    when tiktoken isn't available.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_RE.split(text) if sentence and sentence.strip()]
+
+
+def _terms(text: str) -> List[str]:
+    return [word for word in _WORD_RE.findall(text.lower()) if word not in _STOPWORDS and len(word) > 1]
+
+
+def score_sentences(sentences: List[str], query: str) -> np.ndarray:
+    """
+    TF-IDF cosine of each sentence against the query, with idf computed over the
+    article's own sentences.
+    """
+    sentence_terms = [_terms(sentence) for sentence in sentences]
+    query_terms = _terms(query)
+    vocabulary = {term: i for i, term in enumerate(sorted(set(query_terms)))}
+    if not vocabulary:
+        return np.zeros(len(sentences))
+
+    tf = np.zeros((len(sentences), len(vocabulary)))
+    for row, terms in enumerate(sentence_terms):
+        for term in terms:
+            column = vocabulary.get(term)
+            if column is not None:
+                tf[row, column] += 1
+    document_frequency = (tf > 0).sum(axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    query_vector = np.zeros(len(vocabulary))
+    for term in query_terms:
+        query_vector[vocabulary[term]] += 1
+    query_vector *= idf
+
+    # Only query terms carry weight, but sentence length still normalizes the score
+    lengths = np.sqrt(np.array([max(len(terms), 1) for terms in sentence_terms], dtype=float))
+    weighted = tf * idf
+    return (weighted @ query_vector) / (lengths * np.linalg.norm(query_vector))
+
+
+def fit_to_budget(text: str, query: str, budget: int) -> Tuple[str, int, int]:
+    """
+    Keep the sentences of text most relevant to query until budget tokens are
+    used, in their original order. The lead sentence is always kept when it fits.
+    Returns (text, original_tokens, kept_tokens); text under budget is returned as is.
+    """
+    original_tokens = count_tokens(text)
+    if budget <= 0 or original_tokens <= budget:
+        return text, original_tokens, original_tokens
+
+    sentences = split_sentences(text)
+    scores = score_sentences(sentences, query)
+    if len(scores):
+        scores[0] += scores.max() + 1  # news leads carry the gist of the story
+    lengths = [count_tokens(sentence) + 1 for sentence in sentences]
+
+    chosen = []
+    used = 0
+    for index in np.argsort(-scores, kind="stable"):
+        if used + lengths[index] <= budget:
+            chosen.append(index)
+            used += lengths[index]
+    if not chosen:
+        # A single sentence longer than the budget: cut it by tokens
+        encoding = _encoding()
+        if encoding is None:
+            clipped = text[:budget * 4]
+        else:
+            clipped = encoding.decode(encoding.encode(text, disallowed_special=())[:budget])
+        return clipped, original_tokens, count_tokens(clipped)
+
+    kept = " ".join(sentences[index] for index in sorted(chosen))
+    return kept, original_tokens, count_tokens(kept)
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from dotenv import load_dotenv
+
+from metrics import metrics
+from news_store import read_links, save_links, stale_terms
+from utils import search_news
+
+load_dotenv()
+
+NEWS_TTL = float(os.getenv("NEWS_TTL", 4 * 60 * 60))  # 4 hours
+REFRESH_CHECK_INTERVAL = float(os.getenv("REFRESH_CHECK_INTERVAL", 5 * 60))
+
+
+def search_fresh(terms: List[str]) -> Dict[str, Dict[str, str]]:
+    # Every refresh is forced or stale, so the search cache would only hand back the old links
+    return search_news(terms, use_cache=False)
+
+
+class NewsRefreshScheduler:
+    """
+    Keeps search links fresh in the background (stale-while-revalidate).
+    Readers get whatever is stored right away; terms that are missing or older
+    than ttl are queued and refreshed by a single worker thread. Requests from
+    several sessions for the same terms coalesce into one job, and tracked terms
+    are re-checked every check_interval seconds even when nobody asks for them,
+    until nobody has asked for them in track_expiry seconds (2 * ttl by default).
+    """
+    def __init__(self, ttl: float = NEWS_TTL, check_interval: float = REFRESH_CHECK_INTERVAL,
+                 failure_backoff: float = 5 * 60, search_fn=search_fresh, read_fn=read_links, save_fn=save_links,
+                 track_expiry: float = None):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.failure_backoff = failure_backoff
+        self.track_expiry = 2 * ttl if track_expiry is None else track_expiry
+        self._search_fn = search_fn
+        self._read_fn = read_fn
+        self._save_fn = save_fn
+        self._tracked = {}  # term -> monotonic time it was last asked for
+        self._pending = set()
+        self._in_flight = set()
+        self._retry_after = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Condition(self._lock)
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="news-refresh", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+    def track(self, terms: Iterable[str]):
+        # Tracked terms are kept fresh by the periodic check while they are still being asked for
+        now = time.monotonic()
+        with self._lock:
+            self._tracked.update(dict.fromkeys(terms, now))
+
+    def request_refresh(self, terms: Iterable[str]) -> List[str]:
+        """
+        Queue terms for refresh; terms already queued or being refreshed are not
+        queued twice, and terms whose last refresh failed wait for failure_backoff
+        seconds. Returns the terms newly queued.
+        """
+        terms = list(terms)
+        now = time.monotonic()
+        with self._lock:
+            queued = [
+                term for term in terms
+                if term not in self._pending and term not in self._in_flight
+                and self._retry_after.get(term, 0) <= now
+            ]
+            self._pending.update(queued)
+        metrics.incr("refresh.requested", len(queued))
+        metrics.incr("refresh.coalesced", len(terms) - len(queued))
+        if queued:
+            self._wakeup.set()
+        return queued
+
+    def is_refreshing(self, terms: Iterable[str]) -> bool:
+        with self._lock:
+            return any(term in self._pending or term in self._in_flight for term in terms)
+
+    def get_titles_links(self, terms: List[str], force: bool = False) -> Tuple[Dict[str, Dict[str, str]], Dict[str, float]]:
+        """
+        Stored links for terms, returned immediately. Stale or missing terms (all
+        of them when force is set) are refreshed in the background.
+        """
+        self.start()
+        self.track(terms)
+        try:
+            titles_links, fetched_at = self._read_fn(terms)
+        except Exception as e:
+            print(f"Error reading stored links: {e}")
+            titles_links, fetched_at = {}, {}
+        to_refresh = list(terms) if force else stale_terms(fetched_at, terms, self.ttl)
+        if to_refresh:
+            self.request_refresh(to_refresh)
+        return titles_links, fetched_at
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        # Block until no refresh is queued or running (used by scripts and benchmarks)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def _queue_stale_tracked(self):
+        expired_before = time.monotonic() - self.track_expiry
+        with self._lock:
+            expired = [term for term, last_asked in self._tracked.items() if last_asked < expired_before]
+            for term in expired:
+                del self._tracked[term]
+            tracked = list(self._tracked)
+        metrics.incr("refresh.untracked", len(expired))
+        if not tracked:
+            return
+        try:
+            _, fetched_at = self._read_fn(tracked)
+        except Exception as e:
+            print(f"Error checking stored links: {e}")
+            return
+        self.request_refresh(stale_terms(fetched_at, tracked, self.ttl))
+
+    def _run(self):
+        last_check = time.monotonic()
+        while not self._stopped:
+            self._wakeup.wait(timeout=self.check_interval)
+            self._wakeup.clear()
+            if self._stopped:
+                return
+            if time.monotonic() - last_check >= self.check_interval:
+                last_check = time.monotonic()
+                self._queue_stale_tracked()
+
+            with self._lock:
+                job = sorted(self._pending)
+                self._pending.clear()
+                self._in_flight.update(job)
+            if not job:
+                continue
+
+            start = time.perf_counter()
+            titles_links = {}
+            try:
+                titles_links = self._search_fn(job)
+                if titles_links:
+                    self._save_fn(titles_links)
+                metrics.incr("refresh.terms_refreshed", len(titles_links))
+                print(f"Refreshed {len(titles_links)}/{len(job)} terms in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                metrics.incr("refresh.errors")
+                print(f"Background refresh failed: {e}")
+            finally:
+                with self._idle:
+                    # Terms the search could not return are not retried on every read
+                    retry_at = time.monotonic() + self.failure_backoff
+                    for term in job:
+                        if term not in titles_links:
+                            self._retry_after[term] = retry_at
+                        else:
+                            self._retry_after.pop(term, None)
+                    self._in_flight.difference_update(job)
+                    self._idle.notify_all()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_refresh_scheduler() -> NewsRefreshScheduler:
+    """
+    The process-wide scheduler shared by every Streamlit session, started on first use.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = NewsRefreshScheduler().start()
+        return _scheduler
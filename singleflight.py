@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+from metrics import metrics, series_key
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Process-wide duplicate suppression: while a call for a key is running, other
+    callers with the same key wait for it and share its result (or exception)
+    instead of doing the work again. Counters land in metrics under
+    singleflight.<name>.*.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _join(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            return call, True
+
+    def _finish(self, key, call):
+        with self._lock:
+            del self._calls[key]
+        call.done.set()
+
+    def _record(self, leader: bool, waited: float = 0.0):
+        metrics.incr(f"singleflight.{self.name}.calls")
+        if leader:
+            metrics.incr(f"singleflight.{self.name}.executions")
+        else:
+            metrics.incr(f"singleflight.{self.name}.shared")
+            metrics.observe(f"singleflight.{self.name}.wait_seconds", waited)
+
+    @staticmethod
+    def _outcome(call):
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, fn):
+        call, leader = self._join(key)
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                self._finish(key, call)
+            self._record(True)
+        else:
+            start = time.perf_counter()
+            call.done.wait()
+            self._record(False, time.perf_counter() - start)
+        return self._outcome(call)
+
+    def do_many(self, keys, fn) -> dict:
+        """
+        do() for a batch of keys sharing one call: fn(led_keys) runs for the keys
+        no other caller is working on and returns {key: result}; the other keys
+        are waited for. Returns {key: result} without the keys that got no result
+        or whose leader failed. An exception from fn is raised after the keys
+        it led are released (with no result) to their waiters.
+        """
+        joined = [(key, *self._join(key)) for key in dict.fromkeys(keys)]
+        led = [key for key, _, leader in joined if leader]
+        results = {}
+        if led:
+            error = None
+            try:
+                results = dict(fn(led) or {})
+            except Exception as e:
+                error = e
+            finally:
+                for key, call, leader in joined:
+                    if leader:
+                        call.result = results.get(key)
+                        self._finish(key, call)
+                        self._record(True)
+            if error is not None:
+                raise error
+        for key, call, leader in joined:
+            if not leader:
+                start = time.perf_counter()
+                call.done.wait()
+                self._record(False, time.perf_counter() - start)
+                if call.error is None and call.result is not None:
+                    results[key] = call.result
+        return results
+
+    async def do_async(self, key, coro_fn):
+        # Same as do() for coroutines; waiting happens off the event loop so
+        # leaders on other threads or loops can be joined too
+        call, leader = self._join(key)
+        if leader:
+            try:
+                call.result = await coro_fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                self._finish(key, call)
+            self._record(True)
+        else:
+            start = time.perf_counter()
+            await asyncio.get_running_loop().run_in_executor(None, call.done.wait)
+            self._record(False, time.perf_counter() - start)
+        return self._outcome(call)
+
+    def stats(self) -> dict:
+        snapshot = metrics.snapshot(f"singleflight.{self.name}.")
+        counters = snapshot["counters"]
+        calls = counters.get(f"singleflight.{self.name}.calls", 0)
+        shared = counters.get(f"singleflight.{self.name}.shared", 0)
+        wait = snapshot["observations"].get(f"singleflight.{self.name}.wait_seconds", {"sum": 0.0, "max": 0.0})
+        return {
+            "calls": calls,
+            "executions": counters.get(f"singleflight.{self.name}.executions", 0),
+            "shared": shared,
+            "dedup_ratio": shared / calls if calls else 0.0,
+            "avg_wait_seconds": wait["sum"] / shared if shared else 0.0,
+            "max_wait_seconds": wait["max"],
+        }
+
+
+# One group per kind of work that sessions can duplicate
+term_flight = SingleFlight("term")
+url_flight = SingleFlight("url")
+impact_flight = SingleFlight("impact")
+
+
+def singleflight_stats() -> dict:
+    return {group.name: group.stats() for group in (term_flight, url_flight, impact_flight)}
+
+
+def _singleflight_gauges() -> dict:
+    return {
+        series_key(f"singleflight.{stat}", {"group": group}): value
+        for group, stats in singleflight_stats().items() if stats["calls"]
+        for stat, value in stats.items() if stat in ("dedup_ratio", "avg_wait_seconds", "max_wait_seconds")
+    }
+
+
+metrics.register_gauges(_singleflight_gauges)
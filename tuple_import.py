@@ -0,0 +1,165 @@
+import ast
+import hashlib
+import json
+import re
+from typing import Iterator, List, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+# A tuple line is Python tuple syntax over string literals, one tuple per line:
+#   ("Zomato", "https://...", "food delivery")   or   ('It\'s', "He said \"hi\"")
+# Parentheses are optional, items are single- or double-quoted with backslash
+# escapes, and a trailing comma is allowed. Blank lines are skipped.
+_ITEM = r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"|\'[^\'\\\n]*(?:\\.[^\'\\\n]*)*\''
+_ITEM_RE = re.compile(_ITEM)
+_BODY_RE = re.compile(rf"\s*(?:{_ITEM})(?:\s*,\s*(?:{_ITEM}))*\s*,?\s*")
+_SIMPLE_ESCAPE_RE = re.compile(r"\\([\\'\"nrt])")
+_OTHER_ESCAPE_RE = re.compile(r"\\[^\\'\"nrt]")
+_SIMPLE_ESCAPES = {"\\": "\\", "'": "'", '"': '"', "n": "\n", "r": "\r", "t": "\t"}
+
+PARQUET_BATCH_ROWS = 65536  # rows per Parquet row group when exporting
+
+
+def _unquote(item: str) -> str:
+    body = item[1:-1]
+    # Quotes, backslashes and whitespace are decoded here; literal_eval handles \x, \u and the rest
+    if _OTHER_ESCAPE_RE.search(body):
+        return ast.literal_eval(item)
+    return _SIMPLE_ESCAPE_RE.sub(lambda match: _SIMPLE_ESCAPES[match.group(1)], body)
+
+
+def parse_tuple_line(line: str, N: int = 3) -> Tuple[str, ...]:
+    """
+    The strings of one tuple line. Items past the N-th are joined onto it with
+    spaces, so a tuple never has more than N elements. Returns () for a blank
+    line and raises ValueError when the line does not follow the grammar.
+    """
+    line = line.strip()
+    if not line:
+        return ()
+    if line.startswith("(") and line.endswith(")"):
+        line = line[1:-1]
+    # Fast path for the usual ("a", "b", "c") layout: without escapes, splitting is
+    # exact once the only quotes left are the ones around each item
+    elements = None
+    if "\\" not in line and line.startswith('"') and line.endswith('"') and len(line) > 1:
+        elements = line[1:-1].split('", "')
+        if line.count('"') != 2 * len(elements):
+            elements = None
+    if elements is None:
+        elements = _parse_items(line)
+    if N and len(elements) > N:
+        elements[N - 1:] = [" ".join(elements[N - 1:])]
+    return tuple(elements)
+
+
+def _parse_items(line: str) -> List[str]:
+    if not _BODY_RE.fullmatch(line):
+        raise ValueError(f"not a tuple of quoted strings: {line[:80]!r}")
+    return [item[1:-1] if "\\" not in item else _unquote(item) for item in _ITEM_RE.findall(line)]
+
+
+def _tuple_digest(elements: Tuple[str, ...]) -> bytes:
+    # Unit separator between the elements keeps ("a b", "c") and ("a", "b c") apart
+    return hashlib.blake2b("\x1f".join(elements).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _read_rows(file_path: str, N: int, strict: bool) -> Iterator[Tuple[str, ...]]:
+    if file_path.endswith(".jsonl"):
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield tuple(json.loads(line))
+    elif file_path.endswith(".parquet"):
+        if pa is None:
+            raise ImportError("pyarrow is needed to read Parquet tuple files")
+        for batch in pyarrow.parquet.ParquetFile(file_path).iter_batches(columns=["elements"]):
+            for elements in batch.column(0).to_pylist():
+                yield tuple(elements)
+    else:
+        skipped = 0
+        with open(file_path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    elements = parse_tuple_line(line, N)
+                except ValueError as e:
+                    if strict:
+                        raise ValueError(f"{file_path}:{line_number}: {e}") from None
+                    skipped += 1
+                    continue
+                if elements:
+                    yield elements
+        if skipped:
+            print(f"Skipped {skipped} malformed lines in {file_path}")
+
+
+def iter_tuples(file_path: str, N: int = 3, dedup: bool = True, strict: bool = False) -> Iterator[Tuple[str, ...]]:
+    """
+    Stream the tuples of a tuple file, or of a .jsonl/.parquet export of one, in
+    file order. With dedup, repeats are dropped in the same pass: only a 16-byte
+    digest per distinct tuple is kept, so memory grows with the distinct count,
+    not the file size. Malformed lines are skipped (strict raises instead).
+    """
+    seen = set()
+    for elements in _read_rows(file_path, N, strict):
+        if dedup:
+            digest = _tuple_digest(elements)
+            if digest in seen:
+                continue
+            seen.add(digest)
+        yield elements
+
+
+def tuples_to_list(file_path: str, N: int = 3) -> List[Tuple[str, ...]]:
+    # Distinct tuples in first-seen order
+    return list(iter_tuples(file_path, N))
+
+
+def export_tuples(file_path: str, out_path: str, N: int = 3, dedup: bool = True, strict: bool = False) -> int:
+    """
+    Convert a tuple file to JSONL (one JSON array per line) or, for a .parquet
+    out_path, Parquet with a single list<string> "elements" column, written a
+    row group at a time. Returns the number of tuples written.
+    """
+    rows = iter_tuples(file_path, N, dedup=dedup, strict=strict)
+    written = 0
+    if out_path.endswith(".parquet"):
+        if pa is None:
+            raise ImportError("pyarrow is needed to write Parquet; export to .jsonl instead")
+        schema = pa.schema([("elements", pa.list_(pa.string()))])
+        with pyarrow.parquet.ParquetWriter(out_path, schema, compression="zstd") as writer:
+            batch = []
+            for elements in rows:
+                batch.append(list(elements))
+                if len(batch) >= PARQUET_BATCH_ROWS:
+                    writer.write_table(pa.table({"elements": batch}, schema=schema))
+                    written += len(batch)
+                    batch = []
+            if batch:
+                writer.write_table(pa.table({"elements": batch}, schema=schema))
+                written += len(batch)
+    else:
+        with open(out_path, "w", encoding="utf-8") as f:
+            for elements in rows:
+                f.write(json.dumps(elements, ensure_ascii=False) + "\n")
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert a tuple import file to JSONL or Parquet")
+    parser.add_argument("file")
+    parser.add_argument("out", help="output path; .parquet for Parquet, anything else JSONL")
+    parser.add_argument("-N", type=int, default=3, help="elements per tuple; extra items join the last one")
+    parser.add_argument("--keep-duplicates", action="store_true")
+    parser.add_argument("--strict", action="store_true", help="stop at the first malformed line")
+    args = parser.parse_args()
+
+    count = export_tuples(args.file, args.out, args.N, dedup=not args.keep_duplicates, strict=args.strict)
+    print(f"Wrote {count} tuples to {args.out}")
@@ -1,113 +1,561 @@
-from transformers import BertTokenizer, BertModel
-import torch
 import requests
 import json, os
+import threading
+import time
+import numpy as np
 from serpapi import GoogleSearch
 from dotenv import load_dotenv
-from newspaper import Article
+from newspaper import Article, Config
+from local_store import get_article_cache, get_search_cache, normalize_url
+from metrics import metrics
+from singleflight import term_flight, url_flight
+from tuple_import import tuples_to_list  # noqa: F401  (kept importable from utils)
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 # Use a pipeline as a high-level helper
 
 
 load_dotenv()
 
 #from bs4 import BeautifulSoup
+import asyncio
+import collections
 import concurrent.futures
-from typing import Dict, List
-
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-model = BertModel.from_pretrained("bert-base-uncased")
-
-def tuples_to_list(file_path, N=3):  
-    with open(file_path, 'r') as file:
-        # Reading all lines from the file
-        lines = file.readlines()
-        
-        # Create a list to store the tuples
-        tuple_list = []
-        elements = []
-        temp_ele = ""
-        # Iterate through each line and convert it into a tuple
-        for line in lines:
-            # Strip the newline character and split by the comma
-            raw_elements = line.strip().strip('()').split('", "')
-            elements = []
-            temp_ele = ""
-            for i in range(0, len(raw_elements)):
-                if i < 2:
-                    elements.append(raw_elements[i].strip('"').strip("'"))
-                else:
-                    temp_ele += raw_elements[i].strip('"').strip("'")
-                    if i == len(raw_elements) - 1:
-                        elements.append(temp_ele)
-                    else:
-                        temp_ele += " "
-
-            if len(elements) > 0 and elements != ['']:
-                tuple_list.append(tuple(elements))
-        
-        return list(set(sorted(tuple_list)))
+import queue
+import random
+from typing import Dict, Iterator, List
+from urllib.parse import urlsplit
 
-def generate_embeddings(text):
-    global model
-    global tokenizer
-    encoded_input = tokenizer(text, return_tensors='pt')
-    #output = model(**encoded_input)
-    with torch.no_grad():
-        outputs = model(**encoded_input)
-        last_hidden_states = outputs.last_hidden_state  # Shape: [batch_size, sequence_length, hidden_size]
 
-        sentence_embedding = last_hidden_states.mean(dim=1)  # Shape: [1, hidden_size]
-        return sentence_embedding
+class ModelRegistry:
+    """
+    Process-wide holder for the BERT tokenizer/model.
+    The model is loaded on first use and shared by every Streamlit session in the
+    process. If idle_timeout is set, the model is dropped after that many seconds
+    without use and reloaded on the next call.
+    """
+    def __init__(self, model_name: str = "bert-base-uncased", idle_timeout: float = 0):
+        self.model_name = model_name
+        self.idle_timeout = idle_timeout
+        self._tokenizer = None
+        self._model = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self._unload_timer = None
 
-def calc_cosine_similarity(text: str, term: str) -> bool:
-    #Mean Pooling: If you want to represent longer articles more effectively, consider using mean pooling of sentence embeddings. This involves averaging the embeddings of individual sentences in the article to create a single vector representation for the entire document3.
-    #Long Articles: For very long articles, it may be beneficial to break them down into paragraphs or sections and compare each with the topic. This can provide more granular insights into where specific topics are discussed within the text.
-    return True  # Assuming all texts are relevant for demonstration purposes.
+    def is_loaded(self) -> bool:
+        return self._model is not None
 
-def extract_texts_concurrently(titles_links: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, Dict[str, str]]]:
-    def extract_article_text_newspaper3k(url: str) -> tuple:
-        print(f"Processing URL: {url}")
-        article = Article(url)
-        try:
-            article.download()
-        except Exception as e:
-            print(f"Error during download: {e}")
-            return (url, "")
+    def get(self):
+        with self._lock:
+            if self._model is None:
+                # Heavy imports are deferred so that importing utils stays cheap
+                from transformers import BertTokenizer, BertModel
+
+                print(f"Loading embedding model {self.model_name}")
+                self._tokenizer = BertTokenizer.from_pretrained(self.model_name)
+                self._model = BertModel.from_pretrained(self.model_name)
+                self._model.eval()
+            self._last_used = time.monotonic()
+            self._schedule_unload()
+            return self._tokenizer, self._model
+
+    def unload(self):
+        with self._lock:
+            self._tokenizer = None
+            self._model = None
+            if self._unload_timer is not None:
+                self._unload_timer.cancel()
+                self._unload_timer = None
+
+    def _schedule_unload(self):
+        # Called with the lock held
+        if self.idle_timeout <= 0 or self._unload_timer is not None:
+            return
+        self._unload_timer = threading.Timer(self.idle_timeout, self._unload_if_idle)
+        self._unload_timer.daemon = True
+        self._unload_timer.start()
+
+    def _unload_if_idle(self):
+        with self._lock:
+            self._unload_timer = None
+            idle_for = time.monotonic() - self._last_used
+            if self._model is None:
+                return
+            if idle_for >= self.idle_timeout:
+                print(f"Unloading embedding model {self.model_name} after {idle_for:.0f}s idle")
+                self._tokenizer = None
+                self._model = None
+                return
+            # Used again since the timer was armed; check back when it would expire
+            self._unload_timer = threading.Timer(self.idle_timeout - idle_for, self._unload_if_idle)
+            self._unload_timer.daemon = True
+            self._unload_timer.start()
+
+
+model_registry = ModelRegistry(
+    model_name=os.getenv("EMBEDDING_MODEL", "bert-base-uncased"),
+    idle_timeout=float(os.getenv("EMBEDDING_MODEL_IDLE_TIMEOUT", "0")),
+)
+
+# EAGER_MODEL_LOAD=1 restores the old load-at-import behaviour (used by the startup benchmark)
+if os.getenv("EAGER_MODEL_LOAD") == "1":
+    model_registry.get()
+
+class TokenBucket:
+    """
+    Blocking token bucket refilled at rate_per_minute, holding at most capacity
+    tokens (defaults to one minute's worth). A rate of 0 or less disables limiting.
+    """
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(rate_per_minute, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1):
+        if self.rate <= 0:
+            return
+        # Requests bigger than the bucket would never fit; let them drain it instead
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def retry_with_backoff(fn, attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0,
+                       retry_on=None, on_retry=None):
+    """
+    Call fn until it succeeds, sleeping with exponential backoff and full jitter
+    between attempts. retry_on(err) decides whether an exception is retryable;
+    on_retry(err, attempt) is called before each sleep.
+    """
+    for attempt in range(1, attempts + 1):
         try:
+            return fn()
+        except Exception as err:
+            if attempt == attempts or (retry_on is not None and not retry_on(err)):
+                raise
+            if on_retry is not None:
+                on_retry(err, attempt)
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1))))
+
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "16"))
+EMBED_NUM_THREADS = int(os.getenv("EMBED_NUM_THREADS", "0"))  # 0 leaves torch's default
+EMBED_MAX_LENGTH = 512  # BERT position embedding limit
+
+
+def generate_embeddings_batch(texts: List[str], batch_size: int = None, num_threads: int = None,
+                              max_length: int = EMBED_MAX_LENGTH) -> np.ndarray:
+    """
+    Embed a list of texts and return a contiguous float32 matrix of shape
+    [len(texts), hidden_size], rows in input order.
+    Texts are sorted by token length so each padded batch holds similar lengths,
+    truncated to max_length tokens, and mean-pooled over real tokens only.
+    """
+    import torch
+
+    batch_size = batch_size or EMBED_BATCH_SIZE
+    num_threads = num_threads if num_threads is not None else EMBED_NUM_THREADS
+    if num_threads > 0 and torch.get_num_threads() != num_threads:
+        torch.set_num_threads(num_threads)
+
+    tokenizer, model = model_registry.get()
+    hidden_size = model.config.hidden_size
+    if not texts:
+        return np.zeros((0, hidden_size), dtype=np.float32)
+
+    # Tokenize once without padding; lengths drive the bucketing
+    encoded = tokenizer(list(texts), truncation=True, max_length=max_length, padding=False)
+    input_ids = encoded["input_ids"]
+    order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+
+    embeddings = np.empty((len(input_ids), hidden_size), dtype=np.float32)
+    with torch.no_grad():
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            features = [{key: encoded[key][i] for key in encoded.keys()} for i in bucket]
+            batch = tokenizer.pad(features, padding=True, return_tensors='pt')
+            last_hidden_states = model(**batch).last_hidden_state  # [batch, seq_len, hidden]
+
+            mask = batch["attention_mask"].unsqueeze(-1).to(last_hidden_states.dtype)
+            summed = (last_hidden_states * mask).sum(dim=1)
+            counts = mask.sum(dim=1).clamp(min=1)
+            embeddings[bucket] = (summed / counts).numpy()
+
+    return np.ascontiguousarray(embeddings)
+
+
+def generate_embeddings(text):
+    import torch
+
+    # Single-text wrapper kept for existing callers; shape [1, hidden_size]
+    return torch.from_numpy(generate_embeddings_batch([text]))
+
+# Mean-pooled BERT cosines sit in a compressed high range, so the cut-off is well above 0.5.
+# Set RELEVANCE_THRESHOLD=-1 to keep every article.
+RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0.65"))
+CHUNK_MAX_WORDS = int(os.getenv("RELEVANCE_CHUNK_WORDS", "200"))
+
+
+def split_into_chunks(text: str, max_words: int = CHUNK_MAX_WORDS) -> List[str]:
+    """
+    Split an article into paragraph chunks of at most max_words words.
+    Short paragraphs are merged with their neighbours, long ones are cut on word boundaries.
+    """
+    chunks = []
+    current = []
+    for paragraph in text.split("\n"):
+        words = paragraph.split()
+        if not words:
+            continue
+        if current and len(current) + len(words) > max_words:
+            chunks.append(" ".join(current))
+            current = []
+        while len(words) > max_words:
+            chunks.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        current.extend(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+_term_embedding_cache = {}
+
+
+def _term_embedding(term: str) -> np.ndarray:
+    # Terms repeat across every refresh, so their unit vectors are memoized
+    vector = _term_embedding_cache.get(term)
+    if vector is None:
+        vector = normalize_rows(generate_embeddings_batch([term]))[0]
+        _term_embedding_cache[term] = vector
+    return vector
+
+
+def score_relevance_many(texts: List[str], term: str) -> List[tuple]:
+    """
+    Score each text against term by its best-matching paragraph chunk.
+    All chunks of all texts are embedded in batches and scored with one matrix product.
+    Returns a list of (score, best_chunk) in input order; empty texts score -1.0.
+    """
+    chunks = []
+    owners = []
+    for index, text in enumerate(texts):
+        for chunk in split_into_chunks(text or ""):
+            chunks.append(chunk)
+            owners.append(index)
+
+    results = [(-1.0, "") for _ in texts]
+    if not chunks:
+        return results
+
+    chunk_matrix = normalize_rows(generate_embeddings_batch(chunks))
+    scores = chunk_matrix @ _term_embedding(term)
+
+    owners = np.asarray(owners)
+    # Chunks are grouped by owner, so each text's best chunk is an argmax over its slice
+    boundaries = np.flatnonzero(np.diff(owners)) + 1
+    for positions in np.split(np.arange(len(chunks)), boundaries):
+        best = positions[np.argmax(scores[positions])]
+        results[owners[best]] = (float(scores[best]), chunks[best])
+    return results
+
+
+def score_relevance(text: str, term: str) -> tuple:
+    return score_relevance_many([text], term)[0]
+
+
+def calc_cosine_similarity(text: str, term: str, threshold: float = None) -> bool:
+    # An article is relevant when its best paragraph chunk is close enough to the term
+    threshold = RELEVANCE_THRESHOLD if threshold is None else threshold
+    if threshold < 0:
+        return True
+    score, _ = score_relevance(text, term)
+    return score >= threshold
+
+
+def filter_relevant(texts: List[str], term: str, threshold: float = None) -> List[bool]:
+    threshold = RELEVANCE_THRESHOLD if threshold is None else threshold
+    if threshold < 0:
+        return [True] * len(texts)
+    metrics.incr("relevance.texts", len(texts))
+    with metrics.timer("stage.seconds", stage="relevance"):
+        scores = score_relevance_many(texts, term)
+    return [score >= threshold for score, _ in scores]
+
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "16"))
+FETCH_PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", "4"))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "10"))
+FETCH_MODE = os.getenv("FETCH_MODE", "threaded")  # "threaded" or "async"
+FETCH_PARSE_PROCESSES = int(os.getenv("FETCH_PARSE_PROCESSES", "0"))  # 0 parses on threads
+
+
+def fetch_article_text(url: str, timeout: float = FETCH_TIMEOUT) -> str:
+    """
+    Download and parse one article with newspaper3k, going through the article cache.
+    Returns "" when the download or parse fails.
+    """
+    article_cache = get_article_cache()
+    if article_cache is not None:
+        cached_text = article_cache.get(url)
+        if cached_text is not None:
+            return cached_text
+
+    # Concurrent requests for the same article (from any session) share one download
+    return url_flight.do(normalize_url(url), lambda: _download_article_text(url, timeout, article_cache))
+
+
+def _record_fetch(url: str, seconds: float, ok: bool):
+    # One download: the fetch stage timer plus the per-host latency histogram
+    host = urlsplit(url).netloc
+    metrics.observe("stage.seconds", seconds, labels={"stage": "fetch"})
+    metrics.observe("fetch.host_seconds", seconds, labels={"host": host})
+    if not ok:
+        metrics.incr("fetch.errors", labels={"host": host})
+
+
+def _download_article_text(url: str, timeout: float, article_cache) -> str:
+    config = Config()
+    config.request_timeout = timeout
+    config.fetch_images = False
+    article = Article(url, config=config)
+    start = time.perf_counter()
+    try:
+        article.download()
+    except Exception as e:
+        _record_fetch(url, time.perf_counter() - start, ok=False)
+        print(f"Error during download: {e}")
+        if article_cache is not None:
+            article_cache.put_failure(url)
+        return ""
+    _record_fetch(url, time.perf_counter() - start, ok=True)
+    try:
+        with metrics.timer("stage.seconds", stage="parse"):
             article.parse()
-        except Exception as e:
-            print(f"Error during parsing: {e}")
-            return (url, "")
-        article_text = article.text
-        return (url, article_text)
+    except Exception as e:
+        print(f"Error during parsing: {e}")
+        if article_cache is not None:
+            article_cache.put_failure(url)
+        return ""
+    article_text = article.text
+    if article_cache is not None:
+        if article_text:
+            article_cache.put(url, article_text)
+        else:
+            article_cache.put_failure(url)
+    return article_text
 
-    results = {}
 
+def _parse_article_html(url: str, html: str) -> str:
+    # Module-level so it can run in a process pool as well as a thread pool
+    config = Config()
+    config.fetch_images = False
+    article = Article(url, config=config)
+    article.download(input_html=html)
+    article.parse()
+    return article.text
+
+
+def _group_listings(titles_links: Dict[str, Dict[str, str]]) -> Dict[str, tuple]:
+    # normalized url -> (url, [(term, title), ...]); one fetch serves every listing
+    listings = {}
     for term, links in titles_links.items():
-        print(f"Processing term: {term}")
-        term_results = {}
+        for title, url in links.items():
+            key = normalize_url(url)
+            if key not in listings:
+                listings[key] = (url, [])
+            listings[key][1].append((term, title))
+    return listings
 
-        # Use ThreadPoolExecutor for concurrent text extraction
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            # Create futures for each URL
-            futures = {
-                executor.submit(extract_article_text_newspaper3k, url): title 
-                for title, url in links.items()
-            }
-
-            # Collect results as they complete
-            for future in concurrent.futures.as_completed(futures):
-                title = futures[future]
+
+def iter_article_texts(titles_links: Dict[str, Dict[str, str]], max_workers: int = None,
+                       per_host_limit: int = None, timeout: float = None, mode: str = None) -> Iterator[tuple]:
+    """
+    Fetch every article of every term and yield (term, title, url, text) as each
+    download finishes.
+    A URL listed under several terms is fetched once, and at most per_host_limit
+    requests run against the same host at any time. mode is "threaded"
+    (newspaper3k downloads on a shared thread pool) or "async" (pooled aiohttp
+    client, parsing on a worker pool); it defaults to FETCH_MODE.
+    """
+    max_workers = max_workers or FETCH_MAX_WORKERS
+    per_host_limit = per_host_limit or FETCH_PER_HOST_LIMIT
+    timeout = timeout or FETCH_TIMEOUT
+    mode = mode or FETCH_MODE
+
+    listings = _group_listings(titles_links)
+    print(f"Fetching {len(listings)} unique articles for {len(titles_links)} terms ({mode})")
+
+    if mode == "async" and aiohttp is None:
+        print("aiohttp is not installed, falling back to threaded fetching")
+        mode = "threaded"
+    if mode == "async":
+        fetched = _fetch_async(listings, max_workers, per_host_limit, timeout)
+    else:
+        fetched = _fetch_threaded(listings, max_workers, per_host_limit, timeout)
+
+    for key, text in fetched:
+        url, owners = listings[key]
+        for term, title in owners:
+            yield (term, title, url, text)
+
+
+def _fetch_threaded(listings: Dict[str, tuple], max_workers: int, per_host_limit: int,
+                    timeout: float) -> Iterator[tuple]:
+    pending_by_host = {}
+    for key in listings:
+        pending_by_host.setdefault(urlsplit(key).netloc, collections.deque()).append(key)
+    in_flight_by_host = collections.Counter()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+
+        def dispatch():
+            # Fill free workers round-robin over hosts that are below their limit
+            progress = True
+            while progress and len(futures) < max_workers:
+                progress = False
+                for host, host_queue in pending_by_host.items():
+                    if not host_queue or in_flight_by_host[host] >= per_host_limit:
+                        continue
+                    key = host_queue.popleft()
+                    futures[executor.submit(fetch_article_text, listings[key][0], timeout)] = (host, key)
+                    in_flight_by_host[host] += 1
+                    progress = True
+                    if len(futures) >= max_workers:
+                        break
+
+        dispatch()
+        while futures:
+            done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                host, key = futures.pop(future)
+                in_flight_by_host[host] -= 1
                 try:
-                    url, text = future.result()
-                    text_is_relevant = calc_cosine_similarity(text, term)
-                    if text_is_relevant:
-                        term_results[title] = {url: text}
+                    text = future.result()
                 except Exception as e:
-                    print(f"Error processing {title}: {e}")
+                    print(f"Error processing {listings[key][0]}: {e}")
+                    text = ""
+                yield (key, text)
+            dispatch()
+
 
+def _fetch_async(listings: Dict[str, tuple], max_workers: int, per_host_limit: int,
+                 timeout: float) -> Iterator[tuple]:
+    """
+    Run the aiohttp fetcher on its own event loop thread and hand (key, text)
+    pairs back through a queue, so callers keep a plain iterator.
+    """
+    results = queue.Queue()
+    finished = object()
+
+    def run_loop():
+        try:
+            asyncio.run(_fetch_all_async(listings, max_workers, per_host_limit, timeout, results.put))
+        except Exception as e:
+            print(f"Async fetch failed: {e}")
+        finally:
+            results.put(finished)
+
+    threading.Thread(target=run_loop, name="article-fetch-loop", daemon=True).start()
+    while True:
+        item = results.get()
+        if item is finished:
+            return
+        yield item
+
+
+async def _fetch_all_async(listings: Dict[str, tuple], max_workers: int, per_host_limit: int,
+                           timeout: float, emit):
+    article_cache = get_article_cache()
+    loop = asyncio.get_running_loop()
+    if FETCH_PARSE_PROCESSES > 0:
+        parse_pool = concurrent.futures.ProcessPoolExecutor(max_workers=FETCH_PARSE_PROCESSES)
+    else:
+        parse_pool = concurrent.futures.ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+    # Bounds how many downloaded pages are held in memory waiting to be parsed
+    slots = asyncio.Semaphore(max_workers)
+    connector = aiohttp.TCPConnector(limit=max_workers, limit_per_host=per_host_limit,
+                                     keepalive_timeout=30, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    headers = {"User-Agent": Config().browser_user_agent}
+
+    async def fetch_one(session, key, url):
+        if article_cache is not None:
+            cached_text = article_cache.get(url)
+            if cached_text is not None:
+                emit((key, cached_text))
+                return
+        emit((key, await url_flight.do_async(key, lambda: download(session, url))))
+
+    async def download(session, url):
+        async with slots:
+            text = ""
+            html = None
+            start = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    html = await response.text(errors="replace")
+            except Exception as e:
+                print(f"Error fetching {url}: {e}")
+            _record_fetch(url, time.perf_counter() - start, ok=html is not None)
+            if html is not None:
+                try:
+                    with metrics.timer("stage.seconds", stage="parse"):
+                        text = await loop.run_in_executor(parse_pool, _parse_article_html, url, html)
+                except Exception as e:
+                    print(f"Error parsing {url}: {e}")
+        if article_cache is not None:
+            if text:
+                article_cache.put(url, text)
+            else:
+                article_cache.put_failure(url)
+        return text
+
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=client_timeout, headers=headers) as session:
+            await asyncio.gather(*(fetch_one(session, key, url) for key, (url, _) in listings.items()))
+    finally:
+        parse_pool.shutdown(wait=False)
+
+
+def extract_texts_concurrently(titles_links: Dict[str, Dict[str, str]], max_workers: int = None,
+                               per_host_limit: int = None, timeout: float = None,
+                               mode: str = None) -> Dict[str, Dict[str, Dict[str, str]]]:
+    fetched_by_term = {term: [] for term in titles_links}
+    for term, title, url, text in iter_article_texts(titles_links, max_workers, per_host_limit, timeout, mode):
+        fetched_by_term[term].append((title, url, text))
+
+    results = {}
+    for term, fetched in fetched_by_term.items():
+        # Score every article of the term in one batch before anything reaches the LLM
+        term_results = {}
+        relevant = filter_relevant([text for _, _, text in fetched], term)
+        for (title, url, text), text_is_relevant in zip(fetched, relevant):
+            if text_is_relevant:
+                term_results[title] = {url: text}
+        print(f"Relevance filter kept {len(term_results)}/{len(fetched)} articles for {term}")
         results[term] = term_results
-    print(f"results is {results}")
     return results
 
 def isValidNews(url):
@@ -128,35 +576,92 @@ def extract_titles_links(news_list, term):
                 titles_links.update({item["title"] : item["link"]})
     return {term : titles_links}
 
-def search_news(search_terms):
-    titles_links = {}
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "8"))
+SEARCH_RATE_PER_MINUTE = float(os.getenv("SEARCH_RATE_PER_MINUTE", "120"))
+SEARCH_RETRIES = int(os.getenv("SEARCH_RETRIES", "3"))
+
+search_rate_limiter = TokenBucket(SEARCH_RATE_PER_MINUTE, capacity=SEARCH_MAX_WORKERS)
+
+
+class SearchError(Exception):
+    pass
 
-    for term in search_terms:
-        print(f"Extracting Links for {term}")
 
-        params = {
+def search_term(term: str, search_client=GoogleSearch, use_cache: bool = True) -> Dict[str, str]:
+    """
+    Search Google News for one term and return its {title: link} of valid news sites.
+    Results are served from the search cache while fresh; SerpAPI failures are
+    retried with backoff. use_cache=False always searches (for refreshes) and
+    replaces the cached result with the new one.
+    """
+    params = {
         "q": term,
         "api_key": os.getenv("SERP_API_KEY"),
         "engine": "google_news",
         "gl": "in",
         "hl": "en",
         "num": 5
-        }
+    }
+    search_cache = get_search_cache()
+    cache_key = json.dumps({k: v for k, v in params.items() if k != "api_key"}, sort_keys=True)
+    if search_cache is not None and use_cache:
+        cached_links = search_cache.get(cache_key)
+        if cached_links is not None:
+            metrics.incr("search.cache_hits")
+            return cached_links
 
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        print(f"keys for results : {results}")
-        
-        try:
-            news_results = results["news_results"]
-        except Exception as err:
-            print(f"Error while extracting news : {err}")
-            continue
+    def run_search():
+        search_rate_limiter.acquire()
+        metrics.incr("search.requests")
+        with metrics.timer("stage.seconds", stage="search"):
+            results = search_client(params).get_dict()
+        if "news_results" in results:
+            return results["news_results"]
+        error = results.get("error", "response has no news_results")
+        if "hasn't returned any results" in error:
+            return []
+        raise SearchError(error)
+
+    def fetch_links():
+        news_results = retry_with_backoff(
+            run_search, attempts=SEARCH_RETRIES,
+            on_retry=lambda err, attempt: metrics.incr("search.retries"),
+        )
+        links = extract_titles_links(news_results, term)[term]
+        metrics.incr("search.links", len(links))
+        if search_cache is not None:
+            search_cache.put(cache_key, links)
+        return links
+
+    # A term already being searched by another session is waited for, not searched again
+    return term_flight.do(cache_key, fetch_links)
 
-        # Check if the request was successful
-        titles_links.update(extract_titles_links(news_results, term))
 
-    return titles_links
+def search_news(search_terms, max_workers: int = None, use_cache: bool = True, search_client=GoogleSearch):
+    if isinstance(search_terms, str):
+        search_terms = [search_terms]
+    max_workers = max_workers or SEARCH_MAX_WORKERS
+    found = {}
+    counters_before = metrics.snapshot("search.")["counters"]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(search_term, term, search_client, use_cache): term
+            for term in search_terms
+        }
+        for future in concurrent.futures.as_completed(futures):
+            term = futures[future]
+            try:
+                found[term] = future.result()
+            except Exception as err:
+                metrics.incr("search.errors")
+                print(f"Error while extracting news for {term} : {err}")
+
+    counters = metrics.snapshot("search.")["counters"]
+    print(f"Searched {len(search_terms)} terms: " + ", ".join(
+        f"{k}={v - counters_before.get(k, 0)}" for k, v in sorted(counters.items())))
+    # Keep the caller's term order
+    return {term: found[term] for term in search_terms if term in found}
 
 if __name__ == "__main__":
     titles_links = search_news("zomato")
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from local_store import CACHE_DIR, connect
+from metrics import metrics
+from utils import generate_embeddings_batch, model_registry, normalize_rows, split_into_chunks
+
+load_dotenv()
+
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(CACHE_DIR, "vector_index"))
+VECTOR_CHUNK_WORDS = int(os.getenv("VECTOR_CHUNK_WORDS", "120"))
+VECTOR_EMBED_BATCH = int(os.getenv("VECTOR_EMBED_BATCH", "256"))  # chunks embedded and appended per step
+
+
+def document_key(document: dict) -> str:
+    return hashlib.sha256(json.dumps(document, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class VectorIndex:
+    """
+    Chunk-level semantic index on disk. Unit-normalized float32 chunk embeddings
+    are appended to vectors.f32 and read back through a memory map; chunk text and
+    document metadata live in SQLite next to it. A query is one matrix-vector
+    product and an argpartition over every chunk.
+
+    Documents are keyed by a hash of their contents, so add_documents() only
+    embeds documents the index hasn't seen. The index is tied to the embedding
+    model it was built with and starts over when the model changes.
+    """
+    def __init__(self, path: str = None, embed_fn: Callable[[List[str]], np.ndarray] = generate_embeddings_batch,
+                 model_name: str = None, chunk_words: int = None):
+        self.path = path or VECTOR_INDEX_DIR
+        self.embed_fn = embed_fn
+        self.model_name = model_name or model_registry.model_name
+        self.chunk_words = chunk_words or VECTOR_CHUNK_WORDS
+        self._vectors_path = os.path.join(self.path, "vectors.f32")
+        self._lock = threading.Lock()      # the SQLite connection and row count
+        self._add_lock = threading.Lock()  # one writer at a time; queries keep running while it embeds
+        self._matrix = None
+        os.makedirs(self.path, exist_ok=True)
+        self._conn = connect(os.path.join(self.path, "chunks.sqlite3"))
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS documents (
+                doc_key TEXT PRIMARY KEY,
+                document TEXT NOT NULL,
+                added_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                doc_key TEXT NOT NULL,
+                chunk_no INTEGER NOT NULL,
+                text TEXT NOT NULL
+            )"""
+        )
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        self.dim = int(meta["dim"]) if "dim" in meta else None
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        if meta.get("model", self.model_name) != self.model_name:
+            print(f"Vector index at {self.path} was built with {meta['model']}, rebuilding for {self.model_name}")
+            self._reset()
+        self._truncate_vectors()
+
+    def _reset(self):
+        self._conn.execute("BEGIN")
+        for table in ("meta", "documents", "chunks"):
+            self._conn.execute(f"DELETE FROM {table}")
+        self._conn.execute("COMMIT")
+        self.dim = None
+        self._rows = 0
+        self._matrix = None
+
+    def _truncate_vectors(self):
+        # Rows appended by an add that never committed its metadata are dropped
+        expected = self._rows * (self.dim or 0) * 4
+        if os.path.exists(self._vectors_path) and os.path.getsize(self._vectors_path) != expected:
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(expected)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def has_document(self, doc_key: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM documents WHERE doc_key = ?", (doc_key,)).fetchone() is not None
+
+    def add_documents(self, documents: List[dict], field: str = "content") -> int:
+        """
+        Chunk, embed and append the documents not indexed yet. Embedding runs in
+        batches of VECTOR_EMBED_BATCH chunks; each batch's vectors are written and
+        committed together with their metadata. Returns the number of chunks added.
+        """
+        with self._add_lock:
+            new = {}
+            for document in documents:
+                key = document_key(document)
+                if key not in new and not self.has_document(key):
+                    new[key] = document
+
+            pending = []  # (doc_key, chunk_no, text) still to embed
+            added = 0
+            for key, document in new.items():
+                chunks = split_into_chunks(document.get(field, ""), self.chunk_words)
+                pending.extend((key, chunk_no, text) for chunk_no, text in enumerate(chunks))
+                # Batches close on document boundaries, so a document is never half indexed
+                if len(pending) >= VECTOR_EMBED_BATCH:
+                    added += self._append(pending, new)
+                    pending = []
+            if pending:
+                added += self._append(pending, new)
+            metrics.incr("vector_index.chunks_added", added)
+            return added
+
+    def _append(self, chunks: List[tuple], new_documents: dict) -> int:
+        start = time.perf_counter()
+        vectors = normalize_rows(np.asarray(self.embed_fn([text for _, _, text in chunks]), dtype=np.float32))
+        metrics.observe("vector_index.embed_seconds", time.perf_counter() - start)
+        documents = {key: new_documents[key] for key, _, _ in chunks}
+        with self._lock:
+            return self._write(chunks, documents, vectors)
+
+    def _write(self, chunks: List[tuple], documents: dict, vectors: np.ndarray) -> int:
+        if self.dim is not None and vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding size {vectors.shape[1]} does not match the index ({self.dim})")
+        dim = vectors.shape[1]
+
+        with open(self._vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        now = time.time()
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("dim", str(dim)), ("model", self.model_name)],
+            )
+            self._conn.executemany(
+                "INSERT INTO documents (doc_key, document, added_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(document, ensure_ascii=False), now) for key, document in documents.items()],
+            )
+            self._conn.executemany(
+                "INSERT INTO chunks (row, doc_key, chunk_no, text) VALUES (?, ?, ?, ?)",
+                [(self._rows + i, key, chunk_no, text) for i, (key, chunk_no, text) in enumerate(chunks)],
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(self._rows * dim * 4)
+            raise
+        self.dim = dim
+        self._rows += len(chunks)
+        self._matrix = None  # remapped on the next query
+        return len(chunks)
+
+    def _vectors(self) -> np.ndarray:
+        matrix = self._matrix
+        if matrix is None or matrix.shape[0] != self._rows:
+            if self._rows == 0:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._rows, self.dim))
+            self._matrix = matrix
+        return matrix
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[float, dict]]:
+        """
+        Top k chunks by cosine similarity to the query: [(score, {"row", "doc_key",
+        "chunk_no", "text"})], best first.
+        """
+        with self._lock:
+            matrix = self._vectors()
+        if len(matrix) == 0 or not query.strip():
+            return []
+        # Rows are only ever appended, so this snapshot stays valid while new documents are added
+        start = time.perf_counter()
+        query_vector = normalize_rows(np.asarray(self.embed_fn([query]), dtype=np.float32))[0]
+        scores = matrix @ query_vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        metrics.observe("vector_index.query_seconds", time.perf_counter() - start)
+
+        placeholders = ",".join("?" * len(top))
+        with self._lock:
+            fetched = self._conn.execute(
+                f"SELECT row, doc_key, chunk_no, text FROM chunks WHERE row IN ({placeholders})",
+                [int(row) for row in top],
+            ).fetchall()
+        rows = {
+            row: {"row": row, "doc_key": doc_key, "chunk_no": chunk_no, "text": text}
+            for row, doc_key, chunk_no, text in fetched
+        }
+        return [(float(scores[row]), rows[int(row)]) for row in top if int(row) in rows]
+
+    def search_documents(self, query: str, k: int = 5, chunks_per_query: int = 50) -> List[Tuple[float, dict, str]]:
+        """
+        Top k documents by their best chunk: [(score, document, best_chunk_text)].
+        """
+        best = {}
+        for score, chunk in self.search(query, k=max(k, chunks_per_query)):
+            if chunk["doc_key"] not in best:
+                best[chunk["doc_key"]] = (score, chunk["text"])
+            if len(best) == k:
+                break
+        if not best:
+            return []
+        placeholders = ",".join("?" * len(best))
+        with self._lock:
+            documents = dict(self._conn.execute(
+                f"SELECT doc_key, document FROM documents WHERE doc_key IN ({placeholders})", list(best)
+            ).fetchall())
+        return [(score, json.loads(documents[key]), text) for key, (score, text) in best.items() if key in documents]
+
+
+_vector_index = None
+_vector_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    """
+    Process-wide semantic index under VECTOR_INDEX_DIR.
+    """
+    global _vector_index
+    with _vector_index_lock:
+        if _vector_index is None:
+            _vector_index = VectorIndex()
+        return _vector_index